@@ -2,6 +2,12 @@
 ASGI config for AiBhagya project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serves ``/app_apis/`` as well as the async views under ``/async_apis/``, e.g.
+
+    uvicorn AiBhagya.asgi:application --workers 4
+
+Under ASGI each request runs its sync code in its own thread, so persistent
+connections are not reused across requests: run it with DB_CONN_MAX_AGE=0.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
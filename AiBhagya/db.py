@@ -1,11 +1,32 @@
 from decouple import config, Csv
+
+# Persistent, health-checked connections: a connection is reused for
+# DB_CONN_MAX_AGE seconds (None keeps it open) and pinged before reuse, so a
+# server-side timeout costs a reconnect instead of a failed request.
+PRIMARY = {
+    'ENGINE': config('DB_ENGINE', default='django.db.backends.mysql'),
+    'NAME': config("DB_NAME"),
+    'USER': config("DB_USER", default=''),
+    'PASSWORD': config("DB_PASSWORD", default=''),
+    'HOST': config("DB_HOST", default=''),
+    'PORT': config("DB_PORT", default=''),
+    'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=lambda value: None if value == 'None' else int(value)),
+    'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': config("DB_NAME"),
-        'USER': config("DB_USER"),
-        'PASSWORD': config("DB_PASSWORD"),
-        'HOST': config("DB_HOST"),
-        'PORT': config("DB_PORT"),
+    'default': PRIMARY,
+}
+
+# Optional read replica, used by apis.V1.db_router for read-only views.
+# Unset values are taken from the primary; in tests it mirrors 'default'.
+if config('DB_REPLICA_HOST', default='') or config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **PRIMARY,
+        'NAME': config('DB_REPLICA_NAME', default=PRIMARY['NAME']),
+        'USER': config('DB_REPLICA_USER', default=PRIMARY['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=PRIMARY['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=PRIMARY['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=PRIMARY['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
-}
\ No newline at end of file
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 from decouple import config, Csv
 from .db import DATABASES
+from importlib.util import find_spec
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -57,6 +58,7 @@ INSTALLED_APPS += [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'apis.V1.utils.render_utils.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apis.V1.db_router.StickyPrimaryMiddleware',
 ]
 
 ROOT_URLCONF = 'AiBhagya.urls'
@@ -149,6 +152,51 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
 EMAIL_TIMEOUT = 30  # optional but helpful
 
+# Outbox worker (manage.py send_outbox). Requests only queue mail; the worker
+# delivers it, so the backend can differ, e.g. 'file' or 'console' offline.
+OUTBOX_EMAIL_BACKEND = config("OUTBOX_EMAIL_BACKEND", default=EMAIL_BACKEND)
+EMAIL_FILE_PATH = config("EMAIL_FILE_PATH", default=str(BASE_DIR / 'tmp' / 'emails'))
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=6, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config("OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
+OUTBOX_RETRY_MAX_SECONDS = config("OUTBOX_RETRY_MAX_SECONDS", default=3600, cast=int)
+OUTBOX_LEASE_SECONDS = config("OUTBOX_LEASE_SECONDS", default=300, cast=int)
+
+# Cache. Anything that must be seen by every worker (OTP codes, throttles,
+# invalidation versions) lives here, so production should point this at a
+# shared backend such as redis or memcached.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='aibhagya'),
+    }
+}
+
+# Catalog (categories/reports) read cache; invalidated by admin writes.
+CATALOG_CACHE_ALIAS = config('CATALOG_CACHE_ALIAS', default='default')
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+CATALOG_CACHE_LOCK_SECONDS = config('CATALOG_CACHE_LOCK_SECONDS', default=5, cast=int)
+
+# Read replica (db_router): read-only views read from DB_REPLICA_ALIAS when it
+# is configured in db.py; a user who just wrote reads from the primary for
+# DB_STICKY_SECONDS (keep it above the worst replication lag).
+DATABASE_ROUTERS = ['apis.V1.db_router.ReplicaRouter']
+DB_REPLICA_ALIAS = 'replica'
+DB_STICKY_SECONDS = config('DB_STICKY_SECONDS', default=10, cast=int)
+DB_STICKY_CACHE_ALIAS = config('DB_STICKY_CACHE_ALIAS', default='default')
+
+# OTP storage: CacheOtpBackend (TTL in the cache) or DatabaseOtpBackend (OtpCode table).
+OTP_BACKEND = config('OTP_BACKEND', default='apis.V1.utils.otp_utils.CacheOtpBackend')
+OTP_CACHE_ALIAS = config('OTP_CACHE_ALIAS', default='default')
+OTP_TTL_SECONDS = config('OTP_TTL_SECONDS', default=600, cast=int)
+# Within this window a repeated /register for the same email sends nothing.
+OTP_RESEND_COOLDOWN_SECONDS = config('OTP_RESEND_COOLDOWN_SECONDS', default=60, cast=int)
+
+# Per-worker LRU of authenticated users (see auth_utils); the alias holds
+# the per-user versions that UserMaster signals bump on every write.
+AUTH_USER_CACHE_ALIAS = config('AUTH_USER_CACHE_ALIAS', default='default')
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+AUTH_USER_CACHE_SECONDS = config('AUTH_USER_CACHE_SECONDS', default=60, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -157,9 +205,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST framework configuration (use Simple JWT for auth)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apis.V1.utils.auth_utils.CachedJWTAuthentication',
     ),
     # leave default permissions to views; set globally if desired
+    # orjson for JSON; MessagePack on Accept: application/msgpack once msgpack is installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'apis.V1.utils.render_utils.ORJSONRenderer',
+        *(['apis.V1.utils.render_utils.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # CompressionMiddleware: JSON/MessagePack/CSV/NDJSON bodies from this size up
+    # (gzip, or brotli when the brotli package is installed).
+    'COMPRESSION_MIN_BYTES': config('COMPRESSION_MIN_BYTES', default=1024, cast=int),
+    # Keyset pagination on each view's keyset_ordering; never issues COUNT(*).
+    'DEFAULT_PAGINATION_CLASS': 'apis.V1.utils.pagination_utils.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=50, cast=int),
+    # Token-bucket rates for /register (burst/refill period), see throttle_utils.
+    'DEFAULT_THROTTLE_RATES': {
+        'otp_ip': config('OTP_IP_RATE', default='20/hour'),
+        'otp_email': config('OTP_EMAIL_RATE', default='5/hour'),
+    },
 }
 
 # Simple JWT settings (minimal, override in env if needed)
@@ -177,6 +242,34 @@ AUTH_USER_MODEL = 'apis_v1.UserMaster'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Protected media views (media_utils): '' streams from Python, 'x-accel' hands
+# the file to nginx (internal location MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT), 'x-sendfile' to Apache/lighttpd.
+MEDIA_OFFLOAD = config('MEDIA_OFFLOAD', default='')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+MEDIA_CHUNK_SIZE = config('MEDIA_CHUNK_SIZE', default=64 * 1024, cast=int)
+# Category image derivatives (image_utils): widths in px and background
+# workers per process (0 builds them inline on commit).
+IMAGE_DERIVATIVE_WIDTHS = config('IMAGE_DERIVATIVE_WIDTHS', default='160,320,640,1024', cast=Csv(int))
+IMAGE_DERIVATIVE_WORKERS = config('IMAGE_DERIVATIVE_WORKERS', default=2, cast=int)
+
+# Chunked uploads (upload_utils). UPLOAD_SESSION_DIR must be shared by all
+# workers, outside MEDIA_ROOT (partial files are private) but on the same
+# filesystem so finalize is a rename.
+UPLOAD_SESSION_DIR = config('UPLOAD_SESSION_DIR', default=str(BASE_DIR / 'uploads_tmp'))
+UPLOAD_MAX_BYTES = config('UPLOAD_MAX_BYTES', default=2 * 1024 ** 3, cast=int)
+UPLOAD_CHUNK_MAX_BYTES = config('UPLOAD_CHUNK_MAX_BYTES', default=16 * 1024 ** 2, cast=int)
+UPLOAD_READ_SIZE = config('UPLOAD_READ_SIZE', default=256 * 1024, cast=int)
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=24 * 3600, cast=int)
+UPLOAD_LOCK_SECONDS = config('UPLOAD_LOCK_SECONDS', default=300, cast=int)
+
+# Admin exports (export_utils) read from EXPORT_DB_ALIAS when that alias is
+# configured, else from 'default', in keyset batches of EXPORT_BATCH_SIZE rows.
+EXPORT_DB_ALIAS = config('EXPORT_DB_ALIAS', default=DB_REPLICA_ALIAS)
+EXPORT_BATCH_SIZE = config('EXPORT_BATCH_SIZE', default=2000, cast=int)
+# Bulk catalog import (import_utils): rows per INSERT and rows per manifest.
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=1000, cast=int)
+IMPORT_MAX_ROWS = config('IMPORT_MAX_ROWS', default=50000, cast=int)
 
 
 
@@ -223,5 +316,9 @@ CORS_ALLOW_METHODS = [
 ]
 
 ADS_REQUIRED_PER_REPORT = config("ADS_REQUIRED_PER_REPORT", cast=int)
+# Per-worker ad inventory: version check interval and hard max age (seconds).
+AD_INVENTORY_CHECK_SECONDS = config("AD_INVENTORY_CHECK_SECONDS", default=5, cast=int)
+AD_INVENTORY_MAX_AGE = config("AD_INVENTORY_MAX_AGE", default=300, cast=int)
+AD_WATCHED_CACHE_SECONDS = config("AD_WATCHED_CACHE_SECONDS", default=86400, cast=int)
 
 BASE_URL = config("BASE_URL")
\ No newline at end of file
@@ -55,6 +55,9 @@ urlpatterns = [
 
     # Admin API routes
     path('admin_urls/', include('apis.V1.admin_urls')),
+
+    # Async versions of the I/O-bound app routes, for ASGI deployments
+    path('async_apis/', include('apis.V1.async_urls')),
 ]
 
 
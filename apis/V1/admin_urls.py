@@ -1,14 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views.admin_views import AdViewSet, ReportsCategoryViewSet, ReportMasterViewSet, UserListViewSet
+from .views.export_views import ExportAPIView
+from .views.upload_views import UploadSessionViewSet
 
 router = DefaultRouter()
 router.register(r'report-categories', ReportsCategoryViewSet, basename='report-categories')
 router.register(r'reports', ReportMasterViewSet, basename='reports')
 router.register(r'users', UserListViewSet, basename='users')
 router.register(r'ads', AdViewSet, basename='ads')
+router.register(r'uploads', UploadSessionViewSet, basename='uploads')
 
 
 urlpatterns = [
+    path('exports/<slug:dataset>.<str:fmt>', ExportAPIView.as_view(), name='admin-export'),
     path('', include(router.urls)),
 ]
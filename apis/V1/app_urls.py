@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .views.media_views import AdVideoAPIView, ReportFileAPIView
 from .views.app_views import AdWatchCompleteAPIView, CheckCart, OfferViewsets, RegistrationViewSet, ReportAdsAPIView, ReportsCategoryListViewSet, ReportMasterListViewSet, OtpVerifyViewSet,AddToCartApiViewSet,CartDetailsApiViewSet, UnwindFutureViewset, UserReportsApiViewSet
 
 router = DefaultRouter()
@@ -20,7 +21,9 @@ router.register('user_reports',UserReportsApiViewSet,basename='user_reports')
 urlpatterns = [
     path('', include(router.urls)),
     path('reports/<int:report_id>/ads/',ReportAdsAPIView.as_view(),name='report-ads'),
-    path('ad-watch/complete/', AdWatchCompleteAPIView.as_view(), name='ad-watch-complete')
+    path('ad-watch/complete/', AdWatchCompleteAPIView.as_view(), name='ad-watch-complete'),
+    path('media/ads/<int:ad_id>/', AdVideoAPIView.as_view(), name='ad-video'),
+    path('media/reports/<int:report_id>/', ReportFileAPIView.as_view(), name='report-file'),
 
 
 ]
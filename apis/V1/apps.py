@@ -8,3 +8,6 @@ class V1Config(AppConfig):
     name = 'apis.V1'
     label = 'apis_v1'
     verbose_name = 'APIs V1'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from .views.async_views import (
+    AdWatchCompleteView, CategoryListView, OtpVerifyView, RegisterView, ReportAdsView, ReportListView,
+)
+
+urlpatterns = [
+    path('register/', RegisterView.as_view(), name='async-register'),
+    path('otp-verify/', OtpVerifyView.as_view(), name='async-otp-verify'),
+    path('report-categories/', CategoryListView.as_view(), name='async-report-categories'),
+    path('reports/', ReportListView.as_view(), name='async-reports'),
+    path('reports/<int:report_id>/ads/', ReportAdsView.as_view(), name='async-report-ads'),
+    path('ad-watch/complete/', AdWatchCompleteView.as_view(), name='async-ad-watch-complete'),
+]
@@ -0,0 +1,147 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+Reads go to the replica only inside ``replica_reads()``, which
+``ReplicaReadMixin`` enters for GET/HEAD requests on the read-only views
+once authentication and permissions have run on the primary. Anything
+else, including every write and every read in a write request, stays on
+``default``.
+
+After a write request by an authenticated user, ``StickyPrimaryMiddleware``
+pins that user to the primary for ``DB_STICKY_SECONDS``, longer than the
+expected replication lag, so their next cart, library or unlock read sees
+the write. The pin lives in the shared cache, so it holds across workers.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+_replica_reads = ContextVar('replica_reads', default=False)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_alias():
+    """The configured replica alias, or None when only ``default`` exists."""
+    alias = settings.DB_REPLICA_ALIAS
+    return alias if alias and alias in connections.databases else None
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route reads in this block to the replica (``enabled=False`` forces the primary)."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    return replica_reads(False)
+
+
+def _sticky_key(user_id):
+    return f'db:sticky:{user_id}'
+
+
+def pin_to_primary(user_id):
+    caches[settings.DB_STICKY_CACHE_ALIAS].set(_sticky_key(user_id), 1, settings.DB_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return caches[settings.DB_STICKY_CACHE_ALIAS].get(_sticky_key(user_id)) is not None
+
+
+async def apin_to_primary(user_id):
+    await caches[settings.DB_STICKY_CACHE_ALIAS].aset(_sticky_key(user_id), 1, settings.DB_STICKY_SECONDS)
+
+
+async def ais_pinned(user_id):
+    return await caches[settings.DB_STICKY_CACHE_ALIAS].aget(_sticky_key(user_id)) is not None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # explicit: with None, an instance read from the replica would be saved back to it
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == settings.DB_REPLICA_ALIAS and db != 'default':
+            return False
+        return None
+
+
+class StickyPrimaryMiddleware:
+    """Pin a user to the primary after any successful write request they make.
+
+    Sync and async capable, so an ASGI deployment does not pay a thread hop per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _wrote(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and replica_alias()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._wrote(request, response):
+            # DRF copies the token-authenticated user back onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._wrote(request, response):
+            user = getattr(request, 'user', None)
+            if isinstance(user, SimpleLazyObject):
+                # the session user: resolving it lazily would query from the event loop
+                user = await request.auser()
+            if user is not None and user.is_authenticated:
+                await apin_to_primary(user.pk)
+        return response
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests of an APIView/viewset from the replica.
+
+    Authentication and permissions run first, on the primary (a user who
+    just registered may not be on the replica yet). Users pinned by
+    ``StickyPrimaryMiddleware`` keep reading from the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_alias():
+            user = request.user
+            if not (user and user.is_authenticated and is_pinned(user.pk)):
+                self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            self._replica_token = None
+            _replica_reads.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
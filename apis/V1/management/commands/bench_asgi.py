@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+
+class SlowInput:
+    """``wsgi.input`` of a client that sends its body in ``chunks`` parts, ``delay`` seconds apart.
+
+    Like a real WSGI server's input, ``read(n)`` blocks until ``n`` bytes
+    have arrived, holding the worker thread meanwhile.
+    """
+
+    def __init__(self, body, chunks, delay):
+        self.body, self.delay = body, delay
+        self.chunk_size = max(1, -(-len(body) // chunks))
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.body) if size is None or size < 0 else min(len(self.body), self.position + size)
+        arrived = -(-self.position // self.chunk_size)
+        needed = -(-end // self.chunk_size)
+        time.sleep(self.delay * (needed - arrived))
+        data, self.position = self.body[self.position:end], end
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+class ThreadPeak:
+    """Samples ``threading.active_count()`` in the background."""
+
+    def __enter__(self):
+        self.peak, self._stop = threading.active_count(), threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Side-by-side of the WSGI and ASGI deployments under slow clients, in process: "
+        "N clients POST /otp-verify/ (wrong code, so nothing is written) trickling the "
+        "body in chunks. WSGI runs on a fixed thread pool like gunicorn --threads; ASGI "
+        "on one event loop, with the sync DRF view and with the async view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--chunks', type=int, default=4, help="Body parts per client.")
+        parser.add_argument('--delay', type=float, default=0.05, help="Seconds between body parts.")
+        parser.add_argument('--threads', type=int, default=16, help="WSGI worker threads.")
+
+    def handle(self, *args, **options):
+        clients, chunks, delay = options['clients'], options['chunks'], options['delay']
+        self.body = json.dumps({'email': 'bench-asgi@example.com', 'code': '000000', 'pad': 'x' * 512}).encode()
+        self.stdout.write(
+            f"{clients} concurrent clients, body of {len(self.body)} B in {chunks} parts "
+            f"{delay * 1000:.0f} ms apart (>= {chunks * delay * 1000:.0f} ms per request)"
+        )
+        self.stdout.write(f"  {'deployment':<34} {'wall s':>7} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'threads':>8}")
+
+        # every request is an expected 400; don't log a warning for each (survives django.setup())
+        logging.disable(logging.WARNING)
+        try:
+            self._report(f"WSGI, {options['threads']} threads, sync view",
+                         *self._run_wsgi('/app_apis/otp-verify/', clients, chunks, delay, options['threads']))
+            self._report("ASGI, sync view", *self._run_asgi('/app_apis/otp-verify/', clients, chunks, delay))
+            self._report("ASGI, async view", *self._run_asgi('/async_apis/otp-verify/', clients, chunks, delay))
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def _report(self, name, wall, latencies, statuses, peak_threads):
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"  {name:<34} {wall:7.2f} {len(latencies) / wall:7.0f} {statistics.median(latencies) * 1000:8.0f} "
+            f"{p99 * 1000:8.0f} {peak_threads:8d}"
+        )
+        if set(statuses) != {400}:
+            self.stderr.write(f"    unexpected statuses: {sorted(set(statuses))}")
+
+    def _run_wsgi(self, path, clients, chunks, delay, threads):
+        application = get_wsgi_application()
+
+        def request(submitted):
+            environ = {
+                'REQUEST_METHOD': 'POST', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'REMOTE_ADDR': '127.0.0.1', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(self.body)),
+                'wsgi.input': SlowInput(self.body, chunks, delay), 'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+                'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            status = []
+            b''.join(application(environ, lambda line, headers, exc_info=None: status.append(line)))
+            return time.perf_counter() - submitted, int(status[0].split()[0])
+
+        with ThreadPeak() as peak, ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(request, [time.perf_counter() for _ in range(clients)]))
+            wall = time.perf_counter() - start
+        return wall, [latency for latency, _ in results], [status for _, status in results], peak.peak
+
+    def _run_asgi(self, path, clients, chunks, delay):
+        application = get_asgi_application()
+        chunk_size = max(1, -(-len(self.body) // chunks))
+
+        async def request(index):
+            submitted = time.perf_counter()
+            parts = [self.body[i:i + chunk_size] for i in range(0, len(self.body), chunk_size)]
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'content-type', b'application/json'),
+                            (b'content-length', str(len(self.body)).encode())],
+                'client': ('127.0.0.1', 10000 + index), 'server': ('localhost', 80),
+            }
+            done = asyncio.Event()
+            status = []
+
+            async def receive():
+                if parts:
+                    await asyncio.sleep(delay)
+                    part = parts.pop(0)
+                    return {'type': 'http.request', 'body': part, 'more_body': bool(parts)}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            await application(scope, receive, send)
+            return time.perf_counter() - submitted, status[0]
+
+        async def run():
+            return await asyncio.gather(*(request(index) for index in range(clients)))
+
+        with ThreadPeak() as peak:
+            start = time.perf_counter()
+            results = asyncio.run(run())
+            wall = time.perf_counter() - start
+        return wall, [latency for latency, _ in results], [status for _, status in results], peak.peak
@@ -0,0 +1,52 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apis.V1.models import Cart, ReportMaster, ReportsCategory, UserMaster
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark POST /app_apis/unwind_future/ across cart sizes. "
+        "Each run seeds its cart inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,50,200', help="Comma separated cart sizes.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        self.stdout.write(f"{'cart size':>10} {'queries':>8} {'p50 ms':>9} {'max ms':>9}")
+        for size in sizes:
+            timings, query_count = [], None
+            for _ in range(options['repeat']):
+                with transaction.atomic():
+                    user = self._seed(size)
+                    client = APIClient()
+                    client.force_authenticate(user=user)
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = client.post('/app_apis/unwind_future/')
+                        timings.append((time.perf_counter() - start) * 1000)
+                    assert response.status_code == 201, response.content
+                    query_count = len(queries.captured_queries)
+                    transaction.set_rollback(True)
+            self.stdout.write(
+                f"{size:>10} {query_count:>8} {statistics.median(timings):>9.2f} {max(timings):>9.2f}"
+            )
+
+    def _seed(self, size):
+        user = UserMaster.objects.create_user(email='bench-checkout@example.com', first_name='Bench', last_name='User')
+        category = ReportsCategory.objects.create(category='Bench')
+        ReportMaster.objects.bulk_create(
+            ReportMaster(report_category=category, title=f'Bench report {i}', price='9') for i in range(size)
+        )
+        Cart.objects.bulk_create(
+            Cart(user=user, report=report, amount=9) for report in ReportMaster.objects.filter(report_category=category)
+        )
+        return user
@@ -0,0 +1,129 @@
+import json
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apis.V1.models import Cart, ReportMaster, ReportsCategory, UserGeneratedReport, UserMaster
+from apis.V1.utils import render_utils
+from apis.V1.utils.library_utils import sync_library
+from apis.V1.utils.render_utils import MessagePackRenderer, ORJSONRenderer
+
+ENDPOINTS = (
+    '/app_apis/report-categories/',
+    '/app_apis/reports/',
+    '/app_apis/user_reports/',
+    '/app_apis/cart_details/',
+    '/app_apis/offers/',
+)
+WORDS = (
+    'market growth forecast revenue regional analysis share segment demand supply trend '
+    'outlook competitive landscape pricing consumer industry report annual quarterly'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the response renderers on the catalog, library, cart and offers "
+        "endpoints: render time of DRF's JSONRenderer vs ORJSONRenderer (and MessagePack "
+        "when installed), body sizes raw/gzip/brotli, and end-to-end request latency "
+        "with each JSON renderer. Seeds data inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help="Rows per page-sized list (catalog, cart, library).")
+        parser.add_argument('--iterations', type=int, default=300)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options['rows'])
+            client = APIClient()
+            client.force_authenticate(user=user)
+            self._bench_render(client, options['iterations'])
+            self._bench_requests(client, options['iterations'])
+            transaction.set_rollback(True)
+
+    def _seed(self, rows):
+        rng = random.Random(7)
+        text = lambda k: ' '.join(rng.choices(WORDS, k=k)).capitalize()
+        user = UserMaster.objects.create_user(email='bench-renderers@example.com', first_name='Bench', last_name='User')
+        categories = ReportsCategory.objects.bulk_create(
+            ReportsCategory(category=f'Bench {text(2)} {i}', short_desc=text(12)) for i in range(rows)
+        )
+        ReportMaster.objects.bulk_create(
+            ReportMaster(report_category=categories[i % len(categories)], title=f'{text(5)} {i}',
+                         description=text(40), price=str(rng.randint(5, 500)), file=f'reports/bench{i}.pdf')
+            for i in range(rows)
+        )
+        ReportMaster.objects.bulk_create(
+            ReportMaster(report_category=categories[0], title=f'Offer {text(4)} {i}', description=text(40),
+                         price='9', is_active=False, is_deleted=True)
+            for i in range(rows)
+        )
+        reports = list(ReportMaster.objects.filter(report_category__in=categories, is_deleted=False))
+        Cart.objects.bulk_create(Cart(user=user, report=report, amount=9) for report in reports)
+        UserGeneratedReport.objects.bulk_create(
+            UserGeneratedReport(user=user, report=report, report_category=report.report_category, amount=9)
+            for report in reports
+        )
+        # bulk_create skips the signal that keeps the library table in step
+        sync_library(UserGeneratedReport.objects.filter(user=user))
+        return user
+
+    def _bench_render(self, client, iterations):
+        renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+        if render_utils.msgpack is not None:
+            renderers['msgpack'] = MessagePackRenderer()
+        else:
+            self.stdout.write("msgpack not installed; skipping MessagePack.")
+        if render_utils.brotli is None:
+            self.stdout.write("brotli not installed; skipping brotli sizes.")
+
+        self.stdout.write(f"Render time per response (p50 over {iterations}) and body size:")
+        self.stdout.write(
+            f"  {'endpoint':<30} {'json ms':>8} {'orjson ms':>9} {'speedup':>8} {'msgpack ms':>10}"
+            f" {'json B':>8} {'gzip B':>8} {'br B':>8} {'msgpack B':>9}"
+        )
+        for url in ENDPOINTS:
+            data = client.get(url).data
+            times = {name: self._p50(lambda: renderer.render(data), iterations) for name, renderer in renderers.items()}
+            body = renderers['json'].render(data)
+            if json.loads(renderers['orjson'].render(data)) != json.loads(body):
+                self.stderr.write(f"  {url}: ORJSONRenderer output parses differently from JSONRenderer's")
+            packed = renderers['msgpack'].render(data) if 'msgpack' in renderers else None
+            brotli_size = (len(render_utils.brotli.compress(body, quality=render_utils.BROTLI_QUALITY))
+                           if render_utils.brotli is not None else None)
+            self.stdout.write(
+                f"  {url:<30} {times['json']:8.3f} {times['orjson']:9.3f} {times['json'] / times['orjson']:7.1f}x"
+                f" {self._cell(times.get('msgpack'), '10.3f')} {len(body):8d} {len(compress_string(body)):8d}"
+                f" {self._cell(brotli_size, '8d')} {self._cell(packed and len(packed), '9d')}"
+            )
+
+    def _bench_requests(self, client, iterations):
+        self.stdout.write(f"Request latency, p50 over {iterations} requests (uncompressed / Accept-Encoding: gzip):")
+        self.stdout.write(f"  {'endpoint':<30} {'json ms':>8} {'orjson ms':>9} {'+gzip ms':>9}")
+        for url in ENDPOINTS:
+            # views bind renderer_classes at import, so swap the implementation instead of the setting
+            with mock.patch.object(ORJSONRenderer, 'render', JSONRenderer.render):
+                stdlib = self._p50(lambda: client.get(url), iterations)
+            fast = self._p50(lambda: client.get(url), iterations)
+            compressed = self._p50(lambda: client.get(url, HTTP_ACCEPT_ENCODING='gzip'), iterations)
+            self.stdout.write(f"  {url:<30} {stdlib:8.3f} {fast:9.3f} {compressed:9.3f}")
+
+    def _p50(self, func, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _cell(self, value, spec):
+        width = int(spec.split('.')[0].rstrip('df'))
+        return format(value, spec) if value is not None else f"{'-':>{width}}"
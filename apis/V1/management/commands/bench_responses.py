@@ -0,0 +1,120 @@
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from apis.V1.models import Cart, ReportMaster, ReportsCategory, UserGeneratedReport, UserMaster
+
+IMPORT_PROBE = """
+import os, resource, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings!r})
+import django
+django.setup()
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+before = rss_kb()
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+after = rss_kb()
+print(elapsed, before, after)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the cart, library and offers list endpoints: import cost of the "
+        "view module vs pandas, and p50/p99 latency of the row builders vs the old "
+        "DataFrame round trip. Seeds data inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help="Cart and library rows per user.")
+        parser.add_argument('--iterations', type=int, default=300)
+
+    def handle(self, *args, **options):
+        self._bench_imports()
+        with transaction.atomic():
+            user = self._seed(options['rows'])
+            self._bench_latency(user, options['iterations'])
+            transaction.set_rollback(True)
+
+    def _probe_import(self, module):
+        from django.conf import settings
+        code = IMPORT_PROBE.format(settings=settings.SETTINGS_MODULE, module=module)
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        elapsed, before, after = out.stdout.split()
+        return float(elapsed) * 1000, (int(after) - int(before)) / 1024
+
+    def _bench_imports(self):
+        self.stdout.write("Import cost in a fresh worker (after django.setup()):")
+        for module in ('apis.V1.views.app_views', 'pandas'):
+            try:
+                ms, rss_mb = self._probe_import(module)
+            except subprocess.CalledProcessError:
+                self.stdout.write(f"  {module:<28} not importable")
+                continue
+            self.stdout.write(f"  {module:<28} {ms:8.1f} ms  +{rss_mb:6.1f} MB RSS")
+
+    def _seed(self, rows):
+        user = UserMaster.objects.create_user(email='bench-responses@example.com', first_name='Bench', last_name='User')
+        category = ReportsCategory.objects.create(category='Bench', short_desc='Bench category')
+        ReportMaster.objects.bulk_create(
+            ReportMaster(report_category=category, title=f'Bench report {i}', price='9', file=f'reports/bench{i}.pdf')
+            for i in range(rows)
+        )
+        reports = list(ReportMaster.objects.filter(report_category=category))
+        Cart.objects.bulk_create(Cart(user=user, report=report, amount=9) for report in reports)
+        UserGeneratedReport.objects.bulk_create(
+            UserGeneratedReport(user=user, report=report, report_category=category, amount=9) for report in reports
+        )
+        ReportMaster.objects.create(report_category=category, title='Bench offer', is_active=False, is_deleted=True)
+        return user
+
+    def _bench_latency(self, user, iterations):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        self.stdout.write(f"Endpoint latency over {iterations} requests:")
+        for url in ('/app_apis/cart_details/', '/app_apis/user_reports/', '/app_apis/offers/'):
+            samples = self._sample(lambda: client.get(url), iterations)
+            self.stdout.write(f"  {url:<26} {self._format(samples)}")
+
+        try:
+            import pandas as pd
+        except ImportError:
+            self.stdout.write("pandas not installed; skipping the DataFrame round-trip comparison.")
+            return
+
+        from apis.V1.utils.row_utils import cart_rows
+        rows = cart_rows(user)
+        self.stdout.write("Rows -> response data, per call:")
+        samples = self._sample(lambda: pd.DataFrame(rows).to_dict(orient="records"), iterations)
+        self.stdout.write(f"  {'DataFrame round trip':<26} {self._format(samples)}")
+        samples = self._sample(lambda: list(rows), iterations)
+        self.stdout.write(f"  {'typed rows':<26} {self._format(samples)}")
+
+    def _sample(self, func, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    def _format(self, samples):
+        samples = sorted(samples)
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return f"p50 {statistics.median(samples):7.3f} ms  p99 {p99:7.3f} ms"
@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from apis.V1.models import ReportMaster, ReportsCategory
+from apis.V1.utils.search_utils import search_report_ids
+
+SYLLABLES = 'ka ri mo na te su lo vi ra de pa shi ya go mu ne ti ba lu ze'.split()
+
+
+def vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark report search (full-text index vs LIKE scan) on a synthetic catalog. "
+        "The catalog is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=100_000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--vocabulary', type=int, default=20_000,
+                            help="Distinct words; word frequency follows a Zipf-like curve.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        words = vocabulary(rng, options['vocabulary'])
+        # rank r is drawn with weight 1/r, like natural-language word frequencies
+        weights = [1 / rank for rank in range(1, len(words) + 1)]
+        self.draw = lambda k: rng.choices(words, weights=weights, k=k)
+        with transaction.atomic():
+            start = time.perf_counter()
+            category_ids = self._seed(rng, options['reports'], options['categories'])
+            self.stdout.write(f"seeded {options['reports']} reports in {time.perf_counter() - start:.1f}s")
+
+            queries = [
+                ('one word', lambda: self.draw(1)[0], None),
+                ('two words', lambda: ' '.join(self.draw(2)), None),
+                ('prefix (type-ahead)', lambda: self.draw(1)[0][:4], None),
+                ('word + category', lambda: self.draw(1)[0], lambda: rng.choice(category_ids)),
+            ]
+            self.stdout.write(f"{'query':<22} {'fts p50 ms':>11} {'fts p95 ms':>11} {'like p50 ms':>12} {'like p95 ms':>12}")
+            for label, make_query, make_category in queries:
+                fts, like = [], []
+                for _ in range(options['repeat']):
+                    query = make_query()
+                    category_id = make_category() if make_category else None
+                    fts.append(self._time(lambda: search_report_ids(query, category_id)))
+                    like.append(self._time(lambda: self._like(query, category_id)))
+                self.stdout.write(
+                    f"{label:<22} {self._p(fts, 50):>11.2f} {self._p(fts, 95):>11.2f} "
+                    f"{self._p(like, 50):>12.2f} {self._p(like, 95):>12.2f}"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, rng, reports, categories):
+        created = ReportsCategory.objects.bulk_create(
+            ReportsCategory(category=f'Bench category {i}') for i in range(categories)
+        )
+        category_ids = [category.pk for category in created] if created[0].pk else list(
+            ReportsCategory.objects.filter(category__startswith='Bench category ').values_list('id', flat=True)
+        )
+        batch = []
+        for i in range(reports):
+            title = ' '.join(self.draw(3)).title()
+            description = ' '.join(self.draw(25))
+            batch.append(ReportMaster(
+                report_category_id=rng.choice(category_ids), title=f'{title} {i}', description=description, price='99',
+            ))
+            if len(batch) == 5000:
+                ReportMaster.objects.bulk_create(batch)
+                batch = []
+        ReportMaster.objects.bulk_create(batch)
+        return category_ids
+
+    def _like(self, query, category_id):
+        queryset = ReportMaster.objects.filter(is_active=True, is_deleted=False)
+        for term in query.split():
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        if category_id is not None:
+            queryset = queryset.filter(report_category_id=category_id)
+        return list(queryset.order_by('-id').values_list('id', flat=True)[:20])
+
+    @staticmethod
+    def _time(run):
+        start = time.perf_counter()
+        run()
+        return (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _p(values, percentile):
+        if len(values) < 2:
+            return values[0]
+        return statistics.quantiles(values, n=100)[percentile - 1]
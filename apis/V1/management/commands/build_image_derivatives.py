@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apis.V1.models import ReportsCategory
+from apis.V1.utils.image_utils import generate_category_derivatives
+
+
+class Command(BaseCommand):
+    help = "Create WebP/JPEG derivatives for category images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        ids = ReportsCategory.objects.exclude(image='').exclude(image__isnull=True).values_list('id', flat=True)
+        built = failed = 0
+        for category_id in ids.iterator():
+            try:
+                built += generate_category_derivatives(category_id, force=options['force'])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"category {category_id}: {exc}")
+        self.stdout.write(f"derivatives built for {built} categories, {failed} failed")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apis.V1.utils.cache_utils import catalog_cache_stats, get_catalog_version, reset_catalog_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show the catalog cache hit rate shared by all workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after printing them.")
+
+    def handle(self, *args, **options):
+        stats = catalog_cache_stats()
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else "n/a"
+        self.stdout.write(
+            f"version={get_catalog_version()} hits={stats['hits']} misses={stats['misses']} hit_rate={hit_rate}"
+        )
+        if options['reset']:
+            reset_catalog_cache_stats()
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from apis.V1.models import MediaBlob, ReportMaster, UserGeneratedReport
+from apis.V1.storage import blob_fields, blob_storage
+from apis.V1.utils.cache_utils import bump_catalog_version
+from apis.V1.utils.library_utils import sync_library
+
+REPOINT_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing report files and ad videos into the content-addressed storage, "
+        "merge identical files, recount blob references and optionally delete unreferenced blobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+        parser.add_argument('--gc', action='store_true', help="Delete blobs that nothing references.")
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help="Keep blobs unreferenced for less than this (uploads in flight).")
+
+    def handle(self, *args, **options):
+        storage = blob_storage()
+        dry_run = options['dry_run']
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        moved = missing = 0
+        moved_reports = []
+        replaced = []
+
+        for model, field in blob_fields():
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for name in names.values_list(field, flat=True).distinct().iterator():
+                if name in known:
+                    continue
+                if not storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f"missing: {model.__name__}.{field} {name}")
+                    continue
+                moved += 1
+                if dry_run:
+                    self.stdout.write(f"would move {name}")
+                    continue
+                with storage.open(name, 'rb') as handle:
+                    new_name = storage.save(name, File(handle))
+                rows = model.objects.filter(**{field: name})
+                if model is ReportMaster:
+                    moved_reports.extend(rows.values_list('pk', flat=True))
+                # update() sends no signals; updated_on moves the list ETags off the old URLs
+                rows.update(**{field: new_name, 'updated_on': timezone.now()})
+                if new_name != name:
+                    replaced.append(name)
+                known.add(new_name)
+
+        if moved_reports:
+            # library rows and cached catalog pages still carry the old file URLs
+            for start in range(0, len(moved_reports), REPOINT_BATCH_SIZE):
+                sync_library(UserGeneratedReport.objects.filter(
+                    report_id__in=moved_reports[start:start + REPOINT_BATCH_SIZE],
+                ))
+            bump_catalog_version()
+        # only now that nothing serves the old names
+        for name in replaced:
+            storage.delete(name)
+
+        refs = {}
+        for model, field in blob_fields():
+            for row in model.objects.exclude(**{field: ''}).values(field).annotate(n=Count('pk')).order_by():
+                refs[row[field]] = refs.get(row[field], 0) + row['n']
+
+        blobs = list(MediaBlob.objects.all())
+        now = timezone.now()
+        changed = []
+        for blob in blobs:
+            refcount = refs.get(blob.name, 0)
+            dereferenced_on = None if refcount else (blob.dereferenced_on or now)
+            if (blob.refcount, blob.dereferenced_on) != (refcount, dereferenced_on):
+                blob.refcount, blob.dereferenced_on = refcount, dereferenced_on
+                changed.append(blob)
+        if not dry_run:
+            MediaBlob.objects.bulk_update(changed, ['refcount', 'dereferenced_on'], batch_size=500)
+
+        collected = 0
+        if options['gc']:
+            cutoff = now - timedelta(hours=options['grace_hours'])
+            for blob in blobs:
+                if blob.refcount or blob.dereferenced_on is None or blob.dereferenced_on >= cutoff:
+                    continue
+                if dry_run:
+                    collected += 1
+                    continue
+                # re-checked in the DELETE: a reference or re-upload since the scan keeps the blob
+                deleted, _ = MediaBlob.objects.filter(
+                    pk=blob.pk, refcount=0, dereferenced_on__lt=cutoff,
+                ).delete()
+                if deleted:
+                    collected += 1
+                    storage.delete(blob.name)
+
+        unique = len({blob.sha256 for blob in blobs})
+        self.stdout.write(
+            f"moved={moved} missing={missing} blobs={len(blobs)} distinct_contents={unique} "
+            f"recounted={len(changed)} collected={collected}{' (dry run)' if dry_run else ''}"
+        )
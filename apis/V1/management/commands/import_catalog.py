@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apis.V1.utils.import_utils import CatalogImportError, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Import reports from a CSV manifest, or a ZIP of manifest.csv plus the report files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing.")
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as upload:
+                result = import_catalog(upload, dry_run=options['dry_run'], batch_size=options['batch_size'])
+        except (OSError, CatalogImportError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {'; '.join(error['errors'])}")
+        if result.errors:
+            raise CommandError(f"{len(result.errors)} of {result.rows} rows rejected, nothing imported")
+        if result.dry_run:
+            self.stdout.write(f"{result.rows} rows valid (dry run)")
+        else:
+            self.stdout.write(f"{result.created} reports imported, {result.files} files stored")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apis.V1.models import UserGeneratedReport
+from apis.V1.utils.library_utils import sync_library
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized user library from UserGeneratedReport (backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only rebuild this user's library.")
+
+    def handle(self, *args, **options):
+        queryset = UserGeneratedReport.objects.all()
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+        written = sync_library(queryset)
+        self.stdout.write(f"library rows written: {written}")
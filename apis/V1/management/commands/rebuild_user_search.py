@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apis.V1.models import UserMaster
+from apis.V1.utils.user_search_utils import rebuild_user_tokens
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin user search tokens (backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_user_tokens(UserMaster.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(f"search tokens rebuilt for {count} users")
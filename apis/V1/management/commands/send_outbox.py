@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from apis.V1.utils.mail_utils import BACKEND_ALIASES, deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox over a long-lived mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the due messages once and exit.")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--idle-close', type=float, default=60.0,
+                            help="Close the mail connection after this many idle seconds.")
+        parser.add_argument('--backend', default=None,
+                            help="Email backend path or alias (smtp, console, file, locmem, dummy).")
+
+    def handle(self, *args, **options):
+        backend = options['backend'] or settings.OUTBOX_EMAIL_BACKEND
+        backend = BACKEND_ALIASES.get(backend, backend)
+        connection = get_connection(backend=backend, fail_silently=False)
+        idle_since = None
+        total_sent = total_failed = 0
+
+        try:
+            while True:
+                sent, failed = deliver_batch(connection, batch_size=options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    idle_since = None
+                    self.stdout.write(f"sent={sent} failed={failed}")
+                    continue
+
+                if options['once']:
+                    break
+
+                now = time.monotonic()
+                if idle_since is None:
+                    idle_since = now
+                elif now - idle_since >= options['idle_close']:
+                    connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox done: sent={total_sent} failed={total_failed}"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0011_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otpcode',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='otpcode',
+            name='expires_on',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
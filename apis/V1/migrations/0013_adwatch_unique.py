@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def dedupe_and_backfill(apps, schema_editor):
+    """Keep the first watch per (user, report, ad) and seed the maintained
+    ads_count/ads_duration of still-locked reports from the remaining rows."""
+    AdWatch = apps.get_model('apis_v1', 'AdWatch')
+    UserGeneratedReport = apps.get_model('apis_v1', 'UserGeneratedReport')
+
+    duplicates = (
+        AdWatch.objects.values('user_id', 'report_id', 'ad_id')
+        .annotate(first_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates.iterator():
+        AdWatch.objects.filter(
+            user_id=group['user_id'], report_id=group['report_id'], ad_id=group['ad_id'],
+        ).exclude(id=group['first_id']).delete()
+
+    totals = (
+        AdWatch.objects.filter(completed=True)
+        .values('user_id', 'report_id')
+        .annotate(ads=Count('id'), seconds=Sum('watched_seconds'))
+    )
+    for total in totals.iterator():
+        UserGeneratedReport.objects.filter(
+            user_id=total['user_id'], report_id=total['report_id'], is_locked=True,
+        ).update(ads_count=total['ads'], ads_duration=total['seconds'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0012_otpcode_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_and_backfill, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='adwatch',
+            constraint=models.UniqueConstraint(fields=('user', 'report', 'ad'), name='adwatch_user_report_ad_uniq'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_library(apps, schema_editor):
+    """Fill the library of every existing user; the list view reads only this table."""
+    from apis.V1.utils.library_utils import sync_library
+
+    UserGeneratedReport = apps.get_model('apis_v1', 'UserGeneratedReport')
+    sync_library(UserGeneratedReport.objects.all(), apps.get_model('apis_v1', 'UserLibraryEntry'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0013_adwatch_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLibraryEntry',
+            fields=[
+                ('ugr', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='library_entry', serialize=False, to='apis_v1.usergeneratedreport')),
+                ('title', models.CharField(max_length=500)),
+                ('amount', models.IntegerField(default=0)),
+                ('image', models.CharField(blank=True, max_length=500, null=True)),
+                ('is_locked', models.BooleanField(default=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_entries', to='apis_v1.reportmaster')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='library_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-ugr'], name='library_user_ugr_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_library, migrations.RunPython.noop),
+    ]
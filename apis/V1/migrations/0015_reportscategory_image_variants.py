@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0014_userlibraryentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportscategory',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:33
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0015_reportscategory_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('REPORT_FILE', 'REPORT_FILE'), ('AD_VIDEO', 'AD_VIDEO')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('received', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True)),
+                ('status', models.CharField(choices=[('OPEN', 'OPEN'), ('COMPLETE', 'COMPLETE')], default='OPEN', max_length=10)),
+                ('created_on', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+import apis.V1.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0016_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(max_length=100)),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='video',
+            field=models.FileField(storage=apis.V1.storage.blob_storage, upload_to='ads/'),
+        ),
+        migrations.AlterField(
+            model_name='reportmaster',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=apis.V1.storage.blob_storage, upload_to='reports/'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+FTS = 'apis_v1_reportmaster_fts'
+REPORTS = 'apis_v1_reportmaster'
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS} USING fts5(title, description, content='{REPORTS}', content_rowid='id',"
+    f" tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    f"CREATE TRIGGER {FTS}_ai AFTER INSERT ON {REPORTS} BEGIN"
+    f" INSERT INTO {FTS}(rowid, title, description) VALUES (new.id, new.title, coalesce(new.description, ''));"
+    f" END",
+    f"CREATE TRIGGER {FTS}_ad AFTER DELETE ON {REPORTS} BEGIN"
+    f" INSERT INTO {FTS}({FTS}, rowid, title, description) VALUES ('delete', old.id, old.title, coalesce(old.description, ''));"
+    f" END",
+    f"CREATE TRIGGER {FTS}_au AFTER UPDATE OF title, description ON {REPORTS} BEGIN"
+    f" INSERT INTO {FTS}({FTS}, rowid, title, description) VALUES ('delete', old.id, old.title, coalesce(old.description, ''));"
+    f" INSERT INTO {FTS}(rowid, title, description) VALUES (new.id, new.title, coalesce(new.description, ''));"
+    f" END",
+    f"INSERT INTO {FTS}(rowid, title, description) SELECT id, title, coalesce(description, '') FROM {REPORTS}",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS}_au",
+    f"DROP TABLE IF EXISTS {FTS}",
+]
+MYSQL_FORWARD = [
+    f"CREATE FULLTEXT INDEX report_title_ft ON {REPORTS} (title)",
+    f"CREATE FULLTEXT INDEX report_text_ft ON {REPORTS} (title, description)",
+]
+MYSQL_BACKWARD = [
+    f"DROP INDEX report_title_ft ON {REPORTS}",
+    f"DROP INDEX report_text_ft ON {REPORTS}",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Full-text index for utils.search_utils; a no-op on other databases."""
+
+    dependencies = [
+        ('apis_v1', '0017_mediablob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'mysql': MYSQL_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'mysql': MYSQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_tokens(apps, schema_editor):
+    """Index every existing user; admin user search reads only this table."""
+    from apis.V1.utils.user_search_utils import rebuild_user_tokens
+
+    UserMaster = apps.get_model('apis_v1', 'UserMaster')
+    rebuild_user_tokens(UserMaster.objects.all(), apps.get_model('apis_v1', 'UserSearchToken'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0018_report_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'user'), name='user_search_token_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_tokens, migrations.RunPython.noop),
+    ]
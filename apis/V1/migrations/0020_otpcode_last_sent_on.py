@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0019_usersearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otpcode',
+            name='last_sent_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def clear_referenced(apps, schema_editor):
+    """Existing rows got the migration time; only unreferenced blobs keep it (their grace starts now)."""
+    MediaBlob = apps.get_model('apis_v1', 'MediaBlob')
+    MediaBlob.objects.filter(refcount__gt=0).update(dereferenced_on=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0020_otpcode_last_sent_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='dereferenced_on',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.RunPython(clear_referenced, migrations.RunPython.noop),
+    ]
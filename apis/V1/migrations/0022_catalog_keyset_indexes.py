@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis_v1', '0021_mediablob_dereferenced_on'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportmaster',
+            index=models.Index(fields=['is_active', 'is_deleted', 'created_on', 'id'], name='report_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportmaster',
+            index=models.Index(fields=['report_category', 'is_active', 'is_deleted', 'created_on', 'id'], name='report_cat_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportscategory',
+            index=models.Index(fields=['is_active', 'is_deleted', 'category', 'id'], name='category_active_name_idx'),
+        ),
+    ]
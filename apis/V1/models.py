@@ -1,9 +1,12 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 
 from .managers import UserManager
+from .storage import blob_storage
 
 
 class UserRole(models.Model):
@@ -74,17 +77,40 @@ class UserMaster(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+class UserSearchToken(models.Model):
+    """Normalized search key of a user (email, email name, each name word).
+
+    Maintained by ``user_search_utils.sync_user_tokens``; the admin user
+    search matches prefixes of these through the (token, user) index.
+    """
+    user = models.ForeignKey('UserMaster', on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=254)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'user'], name='user_search_token_uniq'),
+        ]
+
+
 class ReportsCategory(models.Model):
 	category = models.CharField(max_length=255)
 	short_desc = models.TextField(blank=True, null=True)
 	desc = models.TextField(blank=True, null=True)
 	# Image field for category
 	image = models.ImageField(upload_to='categories/', blank=True, null=True)
+	# Resized WebP/JPEG copies of ``image``, see utils.image_utils
+	image_variants = models.JSONField(default=dict, blank=True)
 	is_deleted = models.BooleanField(default=False)
 	is_active = models.BooleanField(default=True)
 	created_on = models.DateTimeField(auto_now_add=True)
 	updated_on = models.DateTimeField(auto_now=True)
 
+	class Meta:
+		indexes = [
+			# keyset pages of the public category list, ordered by (category, id)
+			models.Index(fields=['is_active', 'is_deleted', 'category', 'id'], name='category_active_name_idx'),
+		]
+
 	def __str__(self):
 		return self.category 
 
@@ -94,13 +120,23 @@ class ReportMaster(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     # File field for report attachments
-    file = models.FileField(upload_to='reports/', blank=True, null=True)
+    file = models.FileField(upload_to='reports/', storage=blob_storage, blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     price = models.CharField(max_length=50, blank=True)
 
+    class Meta:
+        indexes = [
+            # keyset pages of the public report list, with and without ?category_id=
+            models.Index(fields=['is_active', 'is_deleted', 'created_on', 'id'], name='report_active_created_idx'),
+            models.Index(
+                fields=['report_category', 'is_active', 'is_deleted', 'created_on', 'id'],
+                name='report_cat_active_created_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -125,10 +161,12 @@ class OtpCode(models.Model):
     """Store OTP codes associated with an email address (or user).
     We keep email as primary association so OTPs can be sent to unregistered emails.
     """
-    email = models.EmailField()
+    email = models.EmailField(db_index=True)
     code = models.CharField(max_length=10)
     created_on = models.DateTimeField(auto_now_add=True)
-    expires_on = models.DateTimeField(null=True, blank=True)
+    # when the code was last e-mailed; a re-send of a live code updates it
+    last_sent_on = models.DateTimeField(null=True, blank=True)
+    expires_on = models.DateTimeField(null=True, blank=True, db_index=True)
     is_used = models.BooleanField(default=False)
 
     def __str__(self):
@@ -150,9 +188,32 @@ class UserGeneratedReport(models.Model):
     generated_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+
+class UserLibraryEntry(models.Model):
+    """Display row of a generated report in the user's library ("my reports").
+
+    Maintained by ``library_utils.sync_library`` whenever the report is
+    generated, unlocked or its title/file/owner name changes, so listing a
+    library reads one index range and nothing else.
+    """
+    ugr = models.OneToOneField(UserGeneratedReport, on_delete=models.CASCADE, primary_key=True, related_name='library_entry')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False, related_name='library_entries')
+    report = models.ForeignKey(ReportMaster, on_delete=models.CASCADE, related_name='library_entries')
+    title = models.CharField(max_length=500)
+    amount = models.IntegerField(default=0)
+    image = models.CharField(max_length=500, blank=True, null=True)
+    is_locked = models.BooleanField(default=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-ugr'], name='library_user_ugr_idx'),
+        ]
+
+
 class Ad(models.Model):
     title = models.CharField(max_length=100)
-    video = models.FileField(upload_to="ads/")
+    video = models.FileField(upload_to="ads/", storage=blob_storage)
     duration = models.PositiveIntegerField(help_text="Duration in seconds")
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
@@ -169,3 +230,92 @@ class AdWatch(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # one watch per ad counts towards a report's unlock
+            models.UniqueConstraint(fields=['user', 'report', 'ad'], name='adwatch_user_report_ad_uniq'),
+        ]
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email queued by request handlers and delivered by the
+    ``send_outbox`` management command, so no request waits on SMTP.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'PENDING'),
+        ('SENT', 'SENT'),
+        ('FAILED', 'FAILED'),
+    )
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=255, blank=True, null=True)
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField()
+    body_html = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_on = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    sent_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_on'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"EmailOutbox(to={self.to_email}, status={self.status})"
+
+
+class MediaBlob(models.Model):
+    """One stored file of the content-addressed storage (see ``storage.py``).
+
+    ``refcount`` is the number of ReportMaster.file / Ad.video values naming it.
+    ``dereferenced_on`` is when it last became unreferenced (creation for a
+    blob that was never referenced) and None while it is referenced; the
+    ``dedupe_media --gc`` grace period runs from it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    refcount = models.IntegerField(default=0)
+    dereferenced_on = models.DateTimeField(default=timezone.now, null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"MediaBlob({self.name}, refs={self.refcount})"
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload of a report file or ad video.
+
+    Chunks are appended to a temp file under UPLOAD_SESSION_DIR; ``received``
+    is the next byte offset the server expects. Finalizing moves the file
+    into the target field's storage.
+    """
+    TARGET_CHOICES = (
+        ('REPORT_FILE', 'REPORT_FILE'),
+        ('AD_VIDEO', 'AD_VIDEO'),
+    )
+    STATUS_CHOICES = (
+        ('OPEN', 'OPEN'),
+        ('COMPLETE', 'COMPLETE'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"UploadSession({self.target}:{self.object_id}, {self.received}/{self.total_size})"
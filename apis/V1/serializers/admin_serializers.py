@@ -1,16 +1,36 @@
+import os
+
 from rest_framework import serializers
-from ..models import Ad, ReportsCategory, ReportMaster, UserMaster
+from django.conf import settings
+from django.urls import reverse
+from ..models import Ad, ReportsCategory, ReportMaster, UploadSession, UserMaster
+from ..utils.image_utils import variants_for
+from ..utils.upload_utils import TARGETS
 
 
 class ReportsCategorySerializer(serializers.ModelSerializer):
     """Serializer for ReportsCategory with file upload support."""
     image = serializers.ImageField(required=False, allow_null=True)
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ReportsCategory
-        fields = ('id', 'category', 'short_desc', 'desc', 'image', 'is_deleted', 'is_active', 'created_on', 'updated_on')
+        fields = ('id', 'category', 'short_desc', 'desc', 'image', 'image_srcset', 'is_deleted', 'is_active', 'created_on', 'updated_on')
         read_only_fields = ('id', 'created_on', 'updated_on')
 
+    def get_image_srcset(self, obj):
+        """``{"webp": "<url> 320w, <url> 640w", "jpeg": ...}``; empty until derivatives exist."""
+        storage = obj.image.storage if obj.image else None
+        request = self.context.get('request')
+        srcset = {}
+        for fmt, widths in variants_for(obj).items():
+            candidates = []
+            for width, name in sorted(widths.items(), key=lambda item: int(item[0])):
+                url = storage.url(name)
+                candidates.append(f"{request.build_absolute_uri(url) if request else url} {width}w")
+            srcset[fmt] = ', '.join(candidates)
+        return srcset
+
     def validate_category(self, value):
         """Ensure category name is not empty and not too short."""
         if not value or len(value.strip()) < 2:
@@ -74,17 +94,48 @@ class UserMasterSerializer(serializers.ModelSerializer):
 
 
 class AdSerializer(serializers.ModelSerializer):
+    # seekable, access-checked playback URL (media_views.AdVideoAPIView)
+    stream_url = serializers.SerializerMethodField()
+
     class Meta:
         model = Ad
         fields = [
             'id',
             'title',
             'video',
+            'stream_url',
             'duration',
             'is_active',
             'created_on'
         ]
 
+    def get_stream_url(self, obj):
+        return f"{settings.BASE_URL}{reverse('ad-video', args=[obj.id])}"
+
 class AdWatchUpdateSerializer(serializers.Serializer):
     report_id = serializers.IntegerField()
     ad_id = serializers.IntegerField()
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'target', 'object_id', 'filename', 'total_size', 'received', 'sha256', 'status', 'created_on')
+        read_only_fields = ('id', 'received', 'sha256', 'status', 'created_on')
+
+    def validate_filename(self, value):
+        name = os.path.basename(value.replace('\\', '/')).strip()
+        if not name:
+            raise serializers.ValidationError("A file name is required.")
+        return name
+
+    def validate_total_size(self, value):
+        if value < 1 or value > settings.UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Size must be between 1 and {settings.UPLOAD_MAX_BYTES} bytes.")
+        return value
+
+    def validate(self, data):
+        model, _ = TARGETS[data['target']]
+        if not model.objects.filter(pk=data['object_id']).exists():
+            raise serializers.ValidationError({'object_id': f"{model.__name__} {data['object_id']} does not exist."})
+        return data
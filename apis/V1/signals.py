@@ -0,0 +1,96 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Ad, ReportMaster, ReportsCategory, UserGeneratedReport, UserLibraryEntry, UserMaster
+from .storage import adjust_blob_refs, blob_fields
+from .utils.app_utils import bump_ad_inventory
+from .utils.auth_utils import invalidate_cached_user
+from .utils.cache_utils import bump_catalog_version
+from .utils.image_utils import schedule_category_derivatives, variants_for
+from .utils.library_utils import sync_library
+from .utils.user_search_utils import TOKEN_FIELDS, sync_user_tokens
+
+
+@receiver(post_save, sender=ReportsCategory)
+@receiver(post_delete, sender=ReportsCategory)
+@receiver(post_save, sender=ReportMaster)
+@receiver(post_delete, sender=ReportMaster)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Bump the catalog version once the admin write is committed."""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=ReportsCategory)
+def build_category_derivatives(sender, instance, **kwargs):
+    """Resize a new or replaced category image once the upload is committed."""
+    if instance.image and not variants_for(instance):
+        transaction.on_commit(partial(schedule_category_derivatives, instance.pk))
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+def invalidate_ad_inventory(sender, **kwargs):
+    """Make every worker rebuild its ad inventory after the write commits."""
+    transaction.on_commit(bump_ad_inventory)
+
+
+@receiver(post_save, sender=UserMaster)
+@receiver(post_delete, sender=UserMaster)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Drop the user from every worker's auth cache after the write commits."""
+    transaction.on_commit(partial(invalidate_cached_user, instance.pk))
+
+
+@receiver(post_save, sender=UserMaster)
+def refresh_user_search_tokens(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the admin user search index in the same transaction as the write."""
+    if update_fields is None or set(update_fields) & set(TOKEN_FIELDS):
+        sync_user_tokens(instance, created=created)
+
+
+@receiver(post_save, sender=UserGeneratedReport)
+def refresh_library_entry(sender, instance, **kwargs):
+    transaction.on_commit(partial(sync_library, UserGeneratedReport.objects.filter(pk=instance.pk)))
+
+
+@receiver(post_save, sender=ReportMaster)
+def refresh_report_library_entries(sender, instance, created, **kwargs):
+    """Title and file are shown in every library holding the report."""
+    if not created:
+        transaction.on_commit(partial(sync_library, UserGeneratedReport.objects.filter(report_id=instance.pk)))
+
+
+@receiver(post_save, sender=UserMaster)
+def refresh_user_library_titles(sender, instance, created, **kwargs):
+    """Library titles start with the owner's name; rebuild them only if it changed."""
+    if created:
+        return
+    stale = UserLibraryEntry.objects.filter(user=instance).exclude(title__startswith=f'{instance.full_name}_')
+    transaction.on_commit(partial(sync_library, UserGeneratedReport.objects.filter(pk__in=stale.values('ugr_id'))))
+
+
+BLOB_FIELDS = dict(blob_fields())
+
+
+@receiver(pre_save, sender=ReportMaster)
+@receiver(pre_save, sender=Ad)
+def remember_blob(sender, instance, **kwargs):
+    field = BLOB_FIELDS[sender]
+    instance._previous_blob = None
+    if not instance._state.adding:
+        instance._previous_blob = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=ReportMaster)
+@receiver(post_save, sender=Ad)
+def count_blob_reference(sender, instance, **kwargs):
+    adjust_blob_refs(getattr(instance, '_previous_blob', None), getattr(instance, BLOB_FIELDS[sender]).name)
+
+
+@receiver(post_delete, sender=ReportMaster)
+@receiver(post_delete, sender=Ad)
+def release_blob_reference(sender, instance, **kwargs):
+    adjust_blob_refs(getattr(instance, BLOB_FIELDS[sender]).name, None)
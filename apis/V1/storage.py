@@ -0,0 +1,119 @@
+"""Content-addressed storage for report files and ad videos.
+
+A file is stored under its SHA-256: ``reports/9f/9f86d0...e8.pdf``. Saving
+bytes that are already stored keeps the existing file and returns its name,
+so identical uploads share one blob. Each blob has a ``MediaBlob`` row with
+its digest, size and content type; rows referencing a blob are counted in
+``MediaBlob.refcount`` by the signals in ``signals.py``. Unreferenced blobs
+are removed by ``manage.py dedupe_media --gc``, never inline, once they have
+been unreferenced (``MediaBlob.dereferenced_on``) for a grace period; saving
+the same bytes again restarts it, so a concurrent upload cannot lose its file.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import tempfile
+
+from django.apps import apps
+from django.db.models import Case, F, Value, When
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+READ_SIZE = 256 * 1024
+# (model, file field) pairs stored here and reference-counted
+BLOB_FIELDS = (('ReportMaster', 'file'), ('Ad', 'video'))
+
+
+def blob_name(directory, digest, extension):
+    return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # the final name is derived from the content in _save
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()[:10]
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = None
+
+        if hasattr(content, 'temporary_file_path'):
+            # already on disk (large upload, chunked upload): hash it in place
+            source = content.temporary_file_path()
+            with open(source, 'rb') as handle:
+                for block in iter(lambda: handle.read(READ_SIZE), b''):
+                    digest.update(block)
+                    size += len(block)
+        else:
+            os.makedirs(self.location, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.location, prefix='.blob-')
+            with os.fdopen(fd, 'wb') as handle:
+                for chunk in content.chunks(READ_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    handle.write(chunk)
+            source = temp_path
+
+        sha256 = digest.hexdigest()
+        name = blob_name(directory, sha256, extension)
+        full_path = self.path(name)
+        try:
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if temp_path:
+                    os.replace(temp_path, full_path)
+                    temp_path = None
+                else:
+                    file_move_safe(source, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if temp_path:
+                os.remove(temp_path)
+
+        content_type = getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+        MediaBlob = apps.get_model('apis_v1', 'MediaBlob')
+        blob, created = MediaBlob.objects.get_or_create(name=name, defaults={
+            'sha256': sha256,
+            'size': size,
+            'content_type': content_type or 'application/octet-stream',
+        })
+        if not created and blob.refcount <= 0:
+            # the same bytes uploaded again while unreferenced: restart the --gc grace period
+            MediaBlob.objects.filter(pk=blob.pk, refcount__lte=0).update(dereferenced_on=timezone.now())
+        return name
+
+
+# location/base_url left unset so MEDIA_ROOT/MEDIA_URL are read lazily
+_storage = ContentAddressedStorage()
+
+
+def blob_storage():
+    return _storage
+
+
+def blob_fields():
+    return [(apps.get_model('apis_v1', model), field) for model, field in BLOB_FIELDS]
+
+
+def adjust_blob_refs(old_name, new_name):
+    """Move one reference from blob ``old_name`` to ``new_name`` (either may be empty)."""
+    if old_name == new_name:
+        return
+    MediaBlob = apps.get_model('apis_v1', 'MediaBlob')
+    if new_name:
+        MediaBlob.objects.filter(name=new_name).update(refcount=F('refcount') + 1, dereferenced_on=None)
+    if old_name:
+        # dereferenced_on is assigned first: MySQL evaluates SET left to right, so it still sees the old refcount
+        MediaBlob.objects.filter(name=old_name).update(
+            dereferenced_on=Case(When(refcount__lte=1, then=Value(timezone.now())), default=F('dereferenced_on')),
+            refcount=F('refcount') - 1,
+        )
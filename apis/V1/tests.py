@@ -1,3 +1,1219 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from uuid import UUID
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .db_router import ReplicaRouter, is_pinned, primary_reads, replica_reads
+from .models import Ad, AdWatch, Cart, EmailOutbox, MediaBlob, ReportMaster, ReportsCategory, UserGeneratedReport, UserLibraryEntry, UserMaster, UserSearchToken
+from .utils.app_utils import ad_inventory
+from .utils.auth_utils import user_cache
+from .utils.cache_utils import get_catalog_version
+from .utils.library_utils import sync_library
+from .utils import render_utils
+from .utils.otp_utils import CacheOtpBackend, get_otp_backend
+from .utils.throttle_utils import TokenBucketThrottle
+from .utils.render_utils import MessagePackRenderer, ORJSONRenderer
+
+# Fixture sizes every endpoint is driven with. A budget that holds for all
+# of them means the endpoint's query count does not grow with N.
+FIXTURE_SIZES = (1, 10, 40)
+SLOWEST_QUERIES_REPORTED = 10
+
+
+def seed(n):
+    """Create ``n`` categories, reports, ads and per-user cart/library rows."""
+    user = UserMaster.objects.create_user(
+        email=f'budget{n}@example.com', first_name='Budget', last_name='User'
+    )
+    other = UserMaster.objects.create_user(email=f'other{n}@example.com', first_name='Other', last_name='User')
+    ReportsCategory.objects.bulk_create(
+        ReportsCategory(category=f'Category {i}', short_desc='short') for i in range(n)
+    )
+    categories = list(ReportsCategory.objects.order_by('id'))
+    ReportMaster.objects.bulk_create(
+        ReportMaster(report_category=categories[i % len(categories)], title=f'Report {i}',
+                     price='9', file=f'reports/report{i}.pdf')
+        for i in range(n)
+    )
+    reports = list(ReportMaster.objects.order_by('id'))
+    offer = ReportMaster.objects.create(
+        report_category=categories[0], title='Offer', is_active=False, is_deleted=True
+    )
+    # one more ad than reports so the last ad is never pre-watched
+    Ad.objects.bulk_create(Ad(title=f'Ad {i}', video=f'ads/ad{i}.mp4', duration=15) for i in range(n + 1))
+    ads = list(Ad.objects.order_by('id'))
+    Cart.objects.bulk_create(Cart(user=user, report=report, amount=9) for report in reports)
+    UserGeneratedReport.objects.bulk_create(
+        UserGeneratedReport(user=user, report=report, report_category=report.report_category, amount=9)
+        for report in reports
+    )
+    sync_library(UserGeneratedReport.objects.filter(user=user))
+    AdWatch.objects.bulk_create(
+        AdWatch(user=user, report=reports[0], ad=ad, completed=True, watched_seconds=15) for ad in ads[:1]
+    )
+    carts = list(Cart.objects.filter(user=user).order_by('id'))
+    get_otp_backend().issue(user.email, '123456')
+    return SimpleNamespace(
+        n=n, user=user, other=other, categories=categories, reports=reports, ads=ads,
+        carts=carts, offer=offer,
+    )
+
+
+# name, method, url(fx), payload(fx) or None, authenticate, budget
+APP_ENDPOINTS = [
+    ('register new user', 'post', lambda fx: '/app_apis/register/', lambda fx: {
+        'email': f'new{fx.n}@example.com', 'first_name': 'New', 'last_name': 'User',
+        'dob': '2000-01-01', 'tob': '10:00', 'pob': 'Pune', 'gender': 'MALE'}, False, 4),
+    ('register existing user', 'post', lambda fx: '/app_apis/register/',
+        lambda fx: {'email': fx.other.email}, False, 2),
+    ('otp verify', 'post', lambda fx: '/app_apis/otp-verify/',
+        lambda fx: {'email': fx.user.email, 'code': '123456'}, False, 1),
+    ('category list', 'get', lambda fx: '/app_apis/report-categories/', None, False, 1),
+    ('category detail', 'get', lambda fx: f'/app_apis/report-categories/{fx.categories[0].id}/', None, False, 1),
+    ('report list', 'get', lambda fx: '/app_apis/reports/', None, False, 1),
+    ('report list by category', 'get',
+        lambda fx: f'/app_apis/reports/?category_id={fx.categories[0].id}', None, False, 1),
+    ('report detail', 'get', lambda fx: f'/app_apis/reports/{fx.reports[0].id}/', None, False, 1),
+    ('cart details', 'get', lambda fx: '/app_apis/cart_details/', None, True, 1),
+    ('offers', 'get', lambda fx: '/app_apis/offers/', None, False, 1),
+    ('cart toggle', 'post', lambda fx: '/app_apis/cart_toggle/',
+        lambda fx: {'cart_id': fx.carts[0].id}, True, 4),
+    ('user reports', 'get', lambda fx: '/app_apis/user_reports/', None, True, 1),
+    # cold per-user watched-ads cache; 3 once it is warm
+    ('report ads', 'get', lambda fx: f'/app_apis/reports/{fx.reports[0].id}/ads/', None, True, 4),
+    ('ad watch complete', 'post', lambda fx: '/app_apis/ad-watch/complete/',
+        lambda fx: {'report_id': fx.reports[0].id, 'ad_id': fx.ads[-1].id}, True, 5),
+]
+
+ADMIN_ENDPOINTS = [
+    ('admin category list', 'get', lambda fx: '/admin_urls/report-categories/', None, True, 1),
+    ('admin category detail', 'get',
+        lambda fx: f'/admin_urls/report-categories/{fx.categories[0].id}/', None, True, 1),
+    ('admin category create', 'post', lambda fx: '/admin_urls/report-categories/',
+        lambda fx: {'category': 'Created'}, True, 1),
+    ('admin category update', 'patch', lambda fx: f'/admin_urls/report-categories/{fx.categories[0].id}/',
+        lambda fx: {'short_desc': 'changed'}, True, 2),
+    ('admin category delete', 'delete',
+        lambda fx: f'/admin_urls/report-categories/{fx.categories[-1].id}/', None, True, 12),
+    ('admin report list', 'get', lambda fx: '/admin_urls/reports/', None, True, 1),
+    ('admin report list by category', 'get',
+        lambda fx: f'/admin_urls/reports/?category={fx.categories[0].id}', None, True, 1),
+    ('admin report detail', 'get', lambda fx: f'/admin_urls/reports/{fx.reports[0].id}/', None, True, 1),
+    ('admin report create', 'post', lambda fx: '/admin_urls/reports/',
+        lambda fx: {'report_category': fx.categories[0].id, 'title': 'Created report'}, True, 3),
+    ('admin report update', 'patch', lambda fx: f'/admin_urls/reports/{fx.reports[0].id}/',
+        lambda fx: {'title': 'Renamed report'}, True, 3),
+    ('admin report delete', 'delete', lambda fx: f'/admin_urls/reports/{fx.reports[-1].id}/', None, True, 9),
+    ('admin user list', 'get', lambda fx: '/admin_urls/users/', None, True, 1),
+    ('admin user search', 'get', lambda fx: '/admin_urls/users/?search=budg', None, True, 1),
+    ('admin user detail', 'get', lambda fx: f'/admin_urls/users/{fx.user.id}/', None, True, 1),
+    ('admin ad list', 'get', lambda fx: '/admin_urls/ads/', None, True, 1),
+    ('admin ad detail', 'get', lambda fx: f'/admin_urls/ads/{fx.ads[0].id}/', None, True, 1),
+    ('admin ad update', 'patch', lambda fx: f'/admin_urls/ads/{fx.ads[0].id}/',
+        lambda fx: {'title': 'Renamed ad'}, True, 3),
+    ('admin ad delete', 'delete', lambda fx: f'/admin_urls/ads/{fx.ads[-1].id}/', None, True, 4),
+]
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook that records every statement and its duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql))
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class QueryBudgetTestCase(APITestCase):
+    """Drive each route against fixtures of several sizes and hold it to a fixed query budget."""
+
+    slow_queries = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.slow_queries:
+            return
+        slowest = sorted(cls.slow_queries, key=lambda item: item[0], reverse=True)[:SLOWEST_QUERIES_REPORTED]
+        sys.stderr.write(f"\nSlowest queries in {cls.__name__}:\n")
+        for seconds, name, sql in slowest:
+            sys.stderr.write(f"  {seconds * 1000:8.2f} ms  {name}: {sql[:160]}\n")
+        cls.slow_queries = []
+
+    def measure(self, name, method, url, payload, authenticate):
+        """Return the query count per fixture size for one endpoint."""
+        counts = {}
+        for size in FIXTURE_SIZES:
+            with transaction.atomic():
+                fx = seed(size)
+                cache.clear()
+                # signals bump the ad inventory on commit, which never happens here
+                ad_inventory.invalidate()
+                ad_inventory.duration(0)
+                get_otp_backend().issue(fx.user.email, '123456')
+                client = APIClient()
+                if authenticate:
+                    client.force_authenticate(user=fx.user)
+                kwargs = {}
+                if payload is not None:
+                    kwargs = {'data': payload(fx), 'format': 'multipart' if '/admin_urls/' in url(fx) else 'json'}
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    response = getattr(client, method)(url(fx), **kwargs)
+                self.assertLess(response.status_code, 400, f"{name} [n={size}]: {response.status_code} {response.content[:300]}")
+                counts[size] = len(recorder.queries)
+                self.slow_queries.extend((seconds, name, sql) for seconds, sql in recorder.queries)
+                transaction.set_rollback(True)
+        return counts
+
+    def assert_budget(self, name, method, url, payload, authenticate, budget):
+        counts = self.measure(name, method, url, payload, authenticate)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"{name}: query count grows with fixture size {counts}",
+        )
+        self.assertLessEqual(max(counts.values()), budget, f"{name}: {counts} exceeds budget of {budget}")
+
+
+def _make_budget_test(name, method, url, payload, authenticate, budget):
+    def test(self):
+        self.assert_budget(name, method, url, payload, authenticate, budget)
+    test.__doc__ = f"{method.upper()} {name} stays within {budget} queries"
+    return test
+
+
+class AppQueryBudgetTests(QueryBudgetTestCase):
+
+    def test_add_to_cart(self):
+        self.assert_budget(
+            'add to cart', 'post', lambda fx: '/app_apis/add_to_cart/',
+            lambda fx: [{'report_id': report.id} for report in fx.reports], True, 5,
+        )
+
+    def test_add_to_cart_new_items(self):
+        def payload(fx):
+            Cart.objects.filter(user=fx.user).delete()
+            return [{'report_id': report.id} for report in fx.reports]
+        self.assert_budget('add to cart new items', 'post', lambda fx: '/app_apis/add_to_cart/', payload, True, 5)
+
+    def test_unwind_future(self):
+        self.assert_budget('unwind future', 'post', lambda fx: '/app_apis/unwind_future/', None, True, 7)
+
+
+class AddToCartTests(APITestCase):
+
+    def test_reports_per_item_result(self):
+        fx = seed(3)
+        Cart.objects.filter(user=fx.user, report=fx.reports[1]).delete()
+        self.client.force_authenticate(user=fx.user)
+
+        payload = [
+            {'report_id': fx.reports[0].id},
+            {'report_id': fx.reports[1].id},
+            {'report_id': fx.reports[1].id},
+            {'report_id': 999999},
+        ]
+        response = self.client.post('/app_apis/add_to_cart/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data'], [
+            {'report_id': fx.reports[0].id, 'result': 'already_in_cart'},
+            {'report_id': fx.reports[1].id, 'result': 'added'},
+            {'report_id': 999999, 'result': 'not_found'},
+        ])
+        self.assertEqual(Cart.objects.get(user=fx.user, report=fx.reports[1]).amount, 9)
+
+
+class UnwindFutureTests(APITestCase):
+
+    def test_checkout_generates_reports_once(self):
+        fx = seed(4)
+        Cart.objects.filter(user=fx.user, report=fx.reports[0]).update(is_checked=False)
+        UserGeneratedReport.objects.filter(user=fx.user).delete()
+        self.client.force_authenticate(user=fx.user)
+
+        first = self.client.post('/app_apis/unwind_future/')
+        second = self.client.post('/app_apis/unwind_future/')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.json()['message'], 'Report not found.')
+        generated = UserGeneratedReport.objects.filter(user=fx.user)
+        self.assertEqual(
+            sorted(generated.values_list('report_id', flat=True)),
+            sorted(report.id for report in fx.reports[1:]),
+        )
+        self.assertTrue(all(report.amount == 9 and report.credit == 9 for report in generated))
+        self.assertEqual(list(Cart.objects.filter(user=fx.user).values_list('report_id', flat=True)),
+                         [fx.reports[0].id])
+
+
+@override_settings(ADS_REQUIRED_PER_REPORT=3)
+class UserLibraryTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(3)
+        self.client.force_authenticate(user=self.fx.user)
+
+    def library(self):
+        return self.client.get('/app_apis/user_reports/').json()['data']['results']
+
+    def test_checkout_and_unlock_update_library(self):
+        UserGeneratedReport.objects.filter(user=self.fx.user, report=self.fx.reports[2]).delete()
+        Cart.objects.filter(user=self.fx.user).exclude(report=self.fx.reports[2]).delete()
+        self.client.post('/app_apis/unwind_future/')
+
+        rows = self.library()
+        self.assertEqual([row['report_id'] for row in rows], [report.id for report in reversed(self.fx.reports)])
+        self.assertTrue(rows[0]['title'].startswith('Budget User_Report 2_'))
+        self.assertEqual(rows[0]['image'], 'http://testserver/media/reports/report2.pdf')
+
+        ad_inventory.invalidate()
+        for ad in self.fx.ads[:3]:
+            self.client.post('/app_apis/ad-watch/complete/', {'report_id': self.fx.reports[2].id, 'ad_id': ad.id})
+        self.assertFalse(self.library()[0]['is_locked'])
+
+    def test_matches_generated_reports(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ReportMaster.objects.get(pk=self.fx.reports[0].pk).save()
+            self.fx.user.first_name = 'Renamed'
+            self.fx.user.save()
+        titles = [row['title'] for row in self.library()]
+        self.assertTrue(all(title.startswith('Renamed User_') for title in titles), titles)
+        self.assertEqual(UserLibraryEntry.objects.filter(user=self.fx.user).count(), len(self.fx.reports))
+
+    @mock.patch('apis.V1.utils.library_utils.SYNC_BATCH_SIZE', 2)
+    def test_migration_backfills_existing_reports(self):
+        expected = self.library()
+        UserLibraryEntry.objects.all().delete()
+        import_module('apis.V1.migrations.0014_userlibraryentry').backfill_library(django_apps, None)
+        self.assertEqual(self.library(), expected)
+
+
+@override_settings(ADS_REQUIRED_PER_REPORT=3)
+class AdWatchCompleteTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(4)
+        ad_inventory.invalidate()
+        self.client.force_authenticate(user=self.fx.user)
+
+    def complete(self, ad, report=None):
+        report = report or self.fx.reports[1]
+        return self.client.post('/app_apis/ad-watch/complete/', {'report_id': report.id, 'ad_id': ad.id})
+
+    def test_unlocks_at_threshold_and_ignores_repeats(self):
+        ads = self.fx.ads
+        self.assertEqual(self.complete(ads[0]).json()['ads_completed_count'], 1)
+        self.assertEqual(self.complete(ads[0]).json()['ads_completed_count'], 1)
+        self.assertFalse(self.complete(ads[1]).json()['report_unlocked'])
+        response = self.complete(ads[2]).json()
+        self.assertEqual((response['ads_completed_count'], response['report_unlocked']), (3, True))
+
+        ugr = UserGeneratedReport.objects.get(user=self.fx.user, report=self.fx.reports[1])
+        self.assertEqual((ugr.ads_count, ugr.ads_duration, ugr.unlocked_mode), (3, 45, 'Ads'))
+        self.assertIsNotNone(ugr.unlocked_on)
+
+    def test_without_generated_report_is_404(self):
+        UserGeneratedReport.objects.filter(user=self.fx.user, report=self.fx.reports[1]).delete()
+        self.assertEqual(self.complete(self.fx.ads[0]).status_code, 404)
+        self.assertFalse(AdWatch.objects.filter(report=self.fx.reports[1]).exists())
+
+
+class AdWatchConcurrencyTests(TransactionTestCase):
+    """Completions racing on one report must count every distinct ad exactly once."""
+    WORKERS = 8
+    ROUNDS = 3
+
+    def complete(self, user, report, ad):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            for _ in range(50):
+                try:
+                    return client.post(
+                        '/app_apis/ad-watch/complete/', {'report_id': report.id, 'ad_id': ad.id}
+                    ).status_code
+                except OperationalError as exc:
+                    # SQLite's shared in-memory test database refuses concurrent
+                    # writers instead of waiting; a retry is just a repeat completion
+                    if 'locked' not in str(exc):
+                        raise
+                    time.sleep(0.01)
+            raise AssertionError('database stayed locked')
+        finally:
+            connection.close()
+
+    def test_concurrent_completions(self):
+        fx = seed(6)
+        ad_inventory.invalidate()
+        report = fx.reports[1]
+        jobs = [ad for ad in fx.ads for _ in range(self.ROUNDS)]
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            statuses = list(pool.map(lambda ad: self.complete(fx.user, report, ad), jobs))
+
+        self.assertEqual(set(statuses), {200})
+        ugr = UserGeneratedReport.objects.get(user=fx.user, report=report)
+        self.assertEqual(ugr.ads_count, len(fx.ads))
+        self.assertEqual(ugr.ads_duration, 15 * len(fx.ads))
+        self.assertFalse(ugr.is_locked)
+        self.assertEqual(AdWatch.objects.filter(user=fx.user, report=report).count(), len(fx.ads))
+
+
+class OtpResendCooldownTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.email = UserMaster.objects.create_user(email='resend@example.com').email
+
+    def register_at(self, now):
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            return self.client.post('/app_apis/register/', {'email': self.email}, format='json').json()['detail']
+
+    def assert_cooldown_follows_resends(self):
+        start = timezone.now()
+        cooldown = timedelta(seconds=settings.OTP_RESEND_COOLDOWN_SECONDS)
+        self.assertEqual(self.register_at(start), 'User exists. OTP sent to email.')
+        self.assertEqual(self.register_at(start + cooldown / 2), 'OTP already sent. Please check your email.')
+        # past the first cooldown the live code is re-sent, which starts a new cooldown
+        self.assertEqual(self.register_at(start + cooldown * 1.5), 'User exists. OTP sent to email.')
+        self.assertEqual(self.register_at(start + cooldown * 2), 'OTP already sent. Please check your email.')
+        self.assertEqual(EmailOutbox.objects.filter(to_email=self.email).count(), 2)
+
+    def test_cache_backend(self):
+        self.assert_cooldown_follows_resends()
+
+    @override_settings(OTP_BACKEND='apis.V1.utils.otp_utils.DatabaseOtpBackend')
+    def test_database_backend(self):
+        self.assert_cooldown_follows_resends()
+
+
+class CacheOtpBackendTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CacheOtpBackend()
+
+    def test_code_is_single_use_across_threads(self):
+        self.backend.issue('race@example.com', '111111')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.backend.consume('race@example.com', '111111'), range(8)))
+        self.assertEqual(results.count(True), 1)
+        self.backend.mark_sent('race@example.com')
+        self.assertIsNone(self.backend.get_live('race@example.com'))
+
+    def test_reissue_during_verify_survives(self):
+        self.backend.issue('race@example.com', '111111')
+        original_delete = LocMemCache.delete
+        reissued = []
+
+        def reissue_then_delete(backend, key, *args, **kwargs):
+            if not reissued:
+                reissued.append(True)
+                self.backend.issue('race@example.com', '222222')
+            return original_delete(backend, key, *args, **kwargs)
+
+        with mock.patch.object(LocMemCache, 'delete', reissue_then_delete):
+            self.backend.consume('race@example.com', '111111')
+        self.assertEqual(self.backend.get_live('race@example.com')['code'], '222222')
+        self.assertTrue(self.backend.consume('race@example.com', '222222'))
+
+    def test_reissue_replaces_the_old_code(self):
+        self.backend.issue('race@example.com', '111111')
+        self.backend.issue('race@example.com', '222222')
+        self.assertFalse(self.backend.consume('race@example.com', '111111'))
+        self.assertEqual(self.backend.get_live('race@example.com')['code'], '222222')
+        self.assertTrue(self.backend.consume('race@example.com', '222222'))
+
+
+class OtpThrottleTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_requests_spend_distinct_tokens(self):
+        class Throttle(TokenBucketThrottle):
+            rate = '3/hour'
+
+            def get_cache_key(self, request, view):
+                return 'throttle_test_bucket'
+
+        original_get = LocMemCache.get
+
+        def slow_get(backend, key, *args, **kwargs):
+            value = original_get(backend, key, *args, **kwargs)
+            # widen the window between reading the bucket and writing it back
+            time.sleep(0.01)
+            return value
+
+        with mock.patch.object(LocMemCache, 'get', slow_get), ThreadPoolExecutor(max_workers=8) as pool:
+            allowed = list(pool.map(lambda _: Throttle().allow_request(None, None), range(8)))
+        self.assertEqual(allowed.count(True), 3)
+
+    def test_list_body_is_rejected(self):
+        response = self.client.post('/app_apis/register/', [{'email': 'a@example.com'}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(ADS_REQUIRED_PER_REPORT=3)
+class AsyncViewTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(3)
+        cache.clear()
+        ad_inventory.invalidate()
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.fx.user)}'}
+
+    async def post(self, path, data, **kwargs):
+        return await self.async_client.post(f'/async_apis/{path}', data, content_type='application/json', **kwargs)
+
+    async def test_register_then_verify(self):
+        payload = {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+                   'dob': '2000-01-01', 'tob': '10:00', 'pob': 'Pune', 'gender': 'MALE'}
+        response = await self.post('register/', payload)
+        self.assertEqual((response.status_code, response.json()), (201, {'detail': 'User created. OTP sent to email.'}))
+        self.assertTrue(await UserMaster.objects.filter(email='new@example.com').aexists())
+        self.assertTrue(await EmailOutbox.objects.filter(to_email='new@example.com').aexists())
+        response = await self.post('register/', {'email': 'new@example.com'})
+        self.assertEqual(response.json(), {'detail': 'OTP already sent. Please check your email.'})
+        self.assertIn('first_name', (await self.post('register/', {'email': 'other@example.com'})).json())
+
+        code = (await sync_to_async(get_otp_backend().get_live)('new@example.com'))['code']
+        self.assertEqual((await self.post('otp-verify/', {'email': 'new@example.com', 'code': 'x'})).status_code, 400)
+        response = await self.post('otp-verify/', {'email': 'new@example.com', 'code': code})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['data']), {'access', 'refresh'})
+
+    async def test_catalog_matches_sync_endpoint(self):
+        for path in ('report-categories/', 'reports/'):
+            expected = (await sync_to_async(self.client.get)(f'/app_apis/{path}')).json()['data']['results']
+            response = await self.async_client.get(f'/async_apis/{path}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['data']['results'], expected)
+            self.assertEqual(response['X-Cache'], 'MISS')
+
+            again = await self.async_client.get(f'/async_apis/{path}', headers={'If-None-Match': response['ETag']})
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual((await self.async_client.get(f'/async_apis/{path}'))['X-Cache'], 'HIT')
+
+    async def test_ads_and_watch_completion(self):
+        report = self.fx.reports[1]
+        self.assertEqual((await self.async_client.get(f'/async_apis/reports/{report.id}/ads/')).status_code, 401)
+        bad_token = {'Authorization': 'Bearer nope'}
+        self.assertEqual((await self.async_client.get(f'/async_apis/reports/{report.id}/ads/', headers=bad_token)).status_code, 401)
+
+        response = await self.async_client.get(f'/async_apis/reports/{report.id}/ads/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['ads']), 3)
+        self.assertEqual((await self.async_client.get('/async_apis/reports/0/ads/', headers=self.auth)).status_code, 404)
+
+        ad = self.fx.ads[0]
+        response = await self.post('ad-watch/complete/', {'report_id': report.id, 'ad_id': ad.id}, headers=self.auth)
+        self.assertEqual(response.json(), {'ad_completed': True, 'ads_completed_count': 1, 'report_unlocked': False})
+        response = await self.post('ad-watch/complete/', {'report_id': report.id, 'ad_id': 0}, headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(2)
+        user_cache.clear()
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.fx.user)}')
+
+    def user_queries(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get('/app_apis/cart_details/')
+        self.assertEqual(response.status_code, 200)
+        return [sql for _, sql in recorder.queries if 'apis_v1_usermaster' in sql.split('WHERE')[0]]
+
+    def test_second_request_skips_user_lookup(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_user_write_invalidates(self):
+        self.user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserMaster.objects.filter(pk=self.fx.user.pk).get().save()
+        self.assertEqual(len(self.user_queries()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fx.user.is_active = False
+            self.fx.user.save()
+        self.assertEqual(self.client.get('/app_apis/cart_details/').status_code, 401)
+
+
+class MediaStreamingTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_OFFLOAD='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.fx = seed(2)
+        self.payload = bytes(range(256)) * 40
+        for name in (self.fx.ads[0].video.name, self.fx.reports[0].file.name):
+            path = Path(media_root, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(self.payload)
+        self.client.force_authenticate(user=self.fx.user)
+        self.ad_url = f'/app_apis/media/ads/{self.fx.ads[0].id}/'
+
+    def test_full_and_ranged_reads(self):
+        full = self.client.get(self.ad_url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b''.join(full.streaming_content), self.payload)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        part = self.client.get(self.ad_url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(part.status_code, 206)
+        self.assertEqual(part['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(part.streaming_content), self.payload[100:200])
+
+        tail = self.client.get(self.ad_url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(tail.streaming_content), self.payload[-10:])
+        self.assertEqual(self.client.get(self.ad_url, HTTP_RANGE=f'bytes={len(self.payload)}-').status_code, 416)
+
+        inverted = self.client.get(self.ad_url, HTTP_RANGE='bytes=5-3')
+        self.assertEqual(inverted.status_code, 200)
+        self.assertEqual(b''.join(inverted.streaming_content), self.payload)
+
+    def test_validators(self):
+        etag = self.client.get(self.ad_url)['ETag']
+        self.assertEqual(self.client.get(self.ad_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.ad_url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.client.get(self.ad_url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"').status_code, 200)
+
+    def test_report_file_requires_unlock(self):
+        url = f'/app_apis/media/reports/{self.fx.reports[0].id}/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        UserGeneratedReport.objects.filter(user=self.fx.user, report=self.fx.reports[0]).update(is_locked=False)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-0').status_code, 206)
+
+    def test_offload_hands_file_to_web_server(self):
+        with override_settings(MEDIA_OFFLOAD='x-accel'):
+            response = self.client.get(self.ad_url, HTTP_ACCEPT='video/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.fx.ads[0].video.name}')
+        self.assertEqual(response.content, b'')
+
+
+def png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new('RGBA', (width, height), (200, 40, 40, 128)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_DERIVATIVE_WORKERS=0, IMAGE_DERIVATIVE_WIDTHS=[160, 320, 640])
+class ImageDerivativeTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_upload_builds_derivatives(self):
+        category = ReportsCategory(category='Stars')
+        with self.captureOnCommitCallbacks(execute=True):
+            category.image.save('stars.png', ContentFile(png_bytes(400, 200)))
+
+        category.refresh_from_db()
+        self.assertEqual(category.image_variants['source'], category.image.name)
+        self.assertEqual(sorted(category.image_variants['webp'], key=int), ['160', '320'])
+        with category.image.storage.open(category.image_variants['jpeg']['160']) as handle:
+            self.assertEqual(Image.open(handle).size, (160, 80))
+
+        row = self.client.get('/app_apis/report-categories/').json()['data']['results'][0]
+        self.assertEqual(
+            row['image_srcset']['webp'],
+            'http://testserver/media/categories/stars_160w.webp 160w, http://testserver/media/categories/stars_320w.webp 320w',
+        )
+
+    def test_backfill_command(self):
+        ReportsCategory.objects.bulk_create([ReportsCategory(category='Moon', image='categories/moon.png')])
+        category = ReportsCategory.objects.get(category='Moon')
+        category.image.storage.save('categories/moon.png', ContentFile(png_bytes(100, 100)))
+
+        call_command('build_image_derivatives', stdout=StringIO())
+        category.refresh_from_db()
+        self.assertEqual(category.image_variants['webp'], {'100': 'categories/moon_100w.webp'})
+
+
+class ChunkedUploadTests(APITestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings_override = override_settings(
+            MEDIA_ROOT=str(Path(root, 'media')), UPLOAD_SESSION_DIR=str(Path(root, 'parts')), UPLOAD_READ_SIZE=7,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.fx = seed(1)
+        self.admin = UserMaster.objects.create_user(email='admin@example.com', first_name='Admin', is_staff=True)
+        self.client.force_authenticate(user=self.admin)
+        self.payload = bytes(range(256)) * 4
+
+    def start(self, **extra):
+        body = {'target': 'REPORT_FILE', 'object_id': self.fx.reports[0].id,
+                'filename': '../annual.pdf', 'total_size': len(self.payload), **extra}
+        return self.client.post('/admin_urls/uploads/', body, format='json')
+
+    def put(self, upload_id, start, end, **headers):
+        return self.client.put(
+            f'/admin_urls/uploads/{upload_id}/', self.payload[start:end + 1],
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.payload)}',
+            **headers,
+        )
+
+    def test_resumable_upload_attaches_file(self):
+        upload_id = self.start().json()['data']['id']
+        self.assertEqual(self.put(upload_id, 0, 499).status_code, 200)
+
+        # a lost response makes the client resend: told where to resume
+        conflict = self.put(upload_id, 0, 499)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()['data']['received'], 500)
+
+        digest = hashlib.sha256(self.payload[500:]).hexdigest()
+        self.assertEqual(self.put(upload_id, 500, 1023, HTTP_X_CHUNK_SHA256=digest).status_code, 200)
+        response = self.client.post(
+            f'/admin_urls/uploads/{upload_id}/finalize/', {'sha256': hashlib.sha256(self.payload).hexdigest()},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        report = ReportMaster.objects.get(pk=self.fx.reports[0].pk)
+        digest = hashlib.sha256(self.payload).hexdigest()
+        self.assertEqual(report.file.name, f'reports/{digest[:2]}/{digest}.pdf')
+        with report.file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.payload)
+        self.assertEqual(os.listdir(settings.UPLOAD_SESSION_DIR), [])
+
+    def test_bad_chunk_is_discarded(self):
+        upload_id = self.start().json()['data']['id']
+        self.assertEqual(self.put(upload_id, 0, 99, HTTP_X_CHUNK_SHA256='0' * 64).status_code, 400)
+        self.assertEqual(self.client.get(f'/admin_urls/uploads/{upload_id}/').json()['data']['received'], 0)
+        self.assertEqual(self.client.post(f'/admin_urls/uploads/{upload_id}/finalize/').status_code, 409)
+
+    def test_chunks_must_fit_the_declared_size(self):
+        upload_id = self.start(total_size=len(self.payload) - 24).json()['data']['id']
+        # total in Content-Range disagrees with the session
+        self.assertEqual(self.put(upload_id, 0, 99).status_code, 400)
+        # right total, but the chunk ends past it
+        response = self.client.put(
+            f'/admin_urls/uploads/{upload_id}/', self.payload[:1024], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-1023/{len(self.payload) - 24}',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f'/admin_urls/uploads/{upload_id}/').json()['data']['received'], 0)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(user=self.fx.user)
+        self.assertEqual(self.start().status_code, 403)
+
+
+class ContentAddressedStorageTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.fx = seed(2)
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.fx.reports
+        first.file.save('a.pdf', ContentFile(b'%PDF same bytes'))
+        second.file.save('b.pdf', ContentFile(b'%PDF same bytes'))
+
+        self.assertEqual(first.file.name, second.file.name)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(
+            (blob.name, blob.size, blob.sha256, blob.refcount),
+            (first.file.name, 15, hashlib.sha256(b'%PDF same bytes').hexdigest(), 2),
+        )
+        self.assertEqual(len(os.listdir(Path(settings.MEDIA_ROOT, 'reports', blob.sha256[:2]))), 1)
+
+        second.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 1)
+
+    def test_served_from_blob_metadata(self):
+        report = self.fx.reports[0]
+        report.file.save('a.pdf', ContentFile(b'%PDF bytes'))
+        UserGeneratedReport.objects.filter(user=self.fx.user, report=report).update(is_locked=False)
+        self.client.force_authenticate(user=self.fx.user)
+
+        response = self.client.get(f'/app_apis/media/reports/{report.id}/')
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(b"%PDF bytes").hexdigest()}"')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_dedupe_media_migrates_existing_files(self):
+        for report in self.fx.reports:
+            path = Path(settings.MEDIA_ROOT, report.file.name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'legacy copy')
+
+        version = get_catalog_version()
+        call_command('dedupe_media', stdout=StringIO(), stderr=StringIO())
+
+        names = set(ReportMaster.objects.filter(pk__in=[r.pk for r in self.fx.reports]).values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        blob = MediaBlob.objects.get(name=name)
+        self.assertEqual((blob.refcount, blob.dereferenced_on), (2, None))
+        self.assertFalse(Path(settings.MEDIA_ROOT, self.fx.reports[0].file.name).exists())
+        # nothing still serves the deleted names
+        images = UserLibraryEntry.objects.filter(user=self.fx.user).values_list('image', flat=True)
+        self.assertTrue(images and all(image.endswith(name) for image in images))
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_gc_grace_runs_from_losing_the_last_reference(self):
+        report = self.fx.reports[0]
+        report.file.save('a.pdf', ContentFile(b'%PDF old bytes'))
+        blob = MediaBlob.objects.get()
+        month_ago = timezone.now() - timedelta(days=30)
+        MediaBlob.objects.filter(pk=blob.pk).update(created_on=month_ago, updated_on=month_ago)
+        gc = lambda: call_command('dedupe_media', '--gc', '--grace-hours', '1', stdout=StringIO(), stderr=StringIO())
+
+        report.file = ''
+        report.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 0)
+        self.assertAlmostEqual(blob.dereferenced_on, timezone.now(), delta=timedelta(minutes=1))
+        gc()
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+        MediaBlob.objects.filter(pk=blob.pk).update(dereferenced_on=timezone.now() - timedelta(hours=2))
+        # uploading the same bytes again restarts the grace period
+        self.fx.reports[1].file.save('b.pdf', ContentFile(b'%PDF old bytes'), save=False)
+        gc()
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+        MediaBlob.objects.filter(pk=blob.pk).update(dereferenced_on=timezone.now() - timedelta(hours=2))
+        gc()
+        self.assertFalse(MediaBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(Path(settings.MEDIA_ROOT, blob.name).exists())
+
+
+class CatalogImportTests(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.astro = ReportsCategory.objects.create(category='Astro', short_desc='short')
+        self.numero = ReportsCategory.objects.create(category='Numerology', short_desc='short')
+        self.client.force_authenticate(user=UserMaster.objects.create_user(email='staff@example.com', is_staff=True))
+
+    def post(self, name, content, **data):
+        return self.client.post('/admin_urls/reports/import/', {'file': SimpleUploadedFile(name, content), **data},
+                                format='multipart')
+
+    def manifest(self, *rows, header='title,category,category_id,price,is_active,file'):
+        return '\n'.join([header, *rows]).encode()
+
+    def archive(self, manifest, files):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('manifest.csv', manifest)
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return buffer.getvalue()
+
+    def test_zip_import_streams_files_to_blob_storage(self):
+        manifest = self.manifest(
+            'Love Report,Astro,,99,,pdfs/love.pdf',
+            f'Career Report,,{self.numero.id},49,false,pdfs/same.pdf',
+            'Health Report,Astro,,,yes,pdfs/love.pdf',
+        )
+        payload = self.archive(manifest, {'pdfs/love.pdf': b'%PDF love', 'pdfs/same.pdf': b'%PDF career'})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.post('catalog.zip', payload)
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['data'], {'rows': 3, 'created': 3, 'files': 2, 'dry_run': False, 'errors': []})
+        self.assertEqual(len(callbacks), 1)
+        reports = {report.title: report for report in ReportMaster.objects.all()}
+        self.assertEqual(reports['Career Report'].report_category_id, self.numero.id)
+        self.assertFalse(reports['Career Report'].is_active)
+        self.assertEqual(reports['Love Report'].file.name, reports['Health Report'].file.name)
+        self.assertEqual(reports['Love Report'].file.read(), b'%PDF love')
+        self.assertEqual(MediaBlob.objects.get(name=reports['Love Report'].file.name).refcount, 2)
+        self.assertEqual(MediaBlob.objects.get(name=reports['Career Report'].file.name).refcount, 1)
+
+    def test_row_errors_reject_the_whole_import(self):
+        ReportMaster.objects.create(report_category=self.astro, title='Existing Report')
+        manifest = self.manifest(
+            'Good Report,Astro,,,,',
+            'No,Astro,,,,',
+            'Lost Report,Palmistry,,,,',
+            'Existing Report,Astro,,,,',
+            'Good Report,Astro,,,maybe,',
+            'Filed Report,Astro,,,,report.pdf',
+        )
+        response = self.post('catalog.csv', manifest)
+
+        self.assertEqual(response.status_code, 400)
+        errors = {error['row']: error['errors'] for error in response.json()['data']['errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6, 7])
+        self.assertIn('Title must be at least 3 characters long.', errors[3])
+        self.assertIn("Category 'Palmistry' does not exist; use category_id.", errors[4])
+        self.assertIn('A report with this title already exists in the category.', errors[5])
+        self.assertEqual(errors[6], ["is_active must be true or false, not 'maybe'."])
+        self.assertIn('A file column needs the files uploaded in a ZIP.', errors[7])
+        self.assertEqual(ReportMaster.objects.count(), 1)
+
+    def test_dry_run_and_permissions(self):
+        response = self.post('catalog.csv', self.manifest('Good Report,Astro,,,,'), dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['data']['dry_run'])
+        self.assertFalse(ReportMaster.objects.exists())
+
+        self.assertEqual(self.post('catalog.zip', self.archive(b'', {'a.txt': b'x'})).status_code, 400)
+        self.client.force_authenticate(user=UserMaster.objects.create_user(email='plain@example.com'))
+        self.assertEqual(self.post('catalog.csv', self.manifest('Good Report,Astro,,,,')).status_code, 403)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        counts = []
+        for size in (10, 40):
+            rows = [f'Report {size}-{i},Astro,,,,' for i in range(size)]
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                response = self.post('catalog.csv', self.manifest(*rows))
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(recorder.queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_management_command(self):
+        path = Path(tempfile.mkdtemp(), 'catalog.csv')
+        self.addCleanup(shutil.rmtree, path.parent)
+        path.write_bytes(self.manifest('Good Report,Astro,,,,', 'Other Report,Numerology,,,,'))
+        out = StringIO()
+        call_command('import_catalog', str(path), stdout=out)
+        self.assertIn('2 reports imported', out.getvalue())
+        self.assertEqual(ReportMaster.objects.count(), 2)
+
+
+class ReportSearchTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.astro, self.numbers = ReportsCategory.objects.bulk_create(
+            [ReportsCategory(category='Astrology'), ReportsCategory(category='Numerology')]
+        )
+        ReportMaster.objects.bulk_create([
+            ReportMaster(report_category=self.astro, title='Career horoscope', description='Jobs and money'),
+            ReportMaster(report_category=self.astro, title='Love report', description='Your career of the heart'),
+            ReportMaster(report_category=self.numbers, title='Career numbers', description='Lucky digits'),
+            ReportMaster(report_category=self.astro, title='Career archive', is_active=False),
+        ])
+
+    def titles(self, **params):
+        response = self.client.get('/app_apis/reports/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.json()['data']['results']]
+
+    def test_ranks_title_matches_first(self):
+        titles = self.titles(q='career')
+        self.assertEqual(titles[-1], 'Love report')
+        self.assertEqual(set(titles), {'Career horoscope', 'Love report', 'Career numbers'})
+
+    def test_prefix_category_and_sync(self):
+        self.assertEqual(self.titles(q='horo'), ['Career horoscope'])
+        self.assertEqual(self.titles(q='car', category_id=self.numbers.id), ['Career numbers'])
+
+        ReportMaster.objects.filter(title='Career numbers').update(title='Digit forecast')
+        cache.clear()
+        self.assertEqual(self.titles(q='car', category_id=self.numbers.id), [])
+        self.assertEqual(self.titles(q='forecast'), ['Digit forecast'])
+        self.assertEqual(self.titles(q='  '), [])
+
+
+class AdminUserSearchTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(user=UserMaster.objects.create_user(email='staff@example.com', is_staff=True))
+        self.ana = UserMaster.objects.create_user(email='ana.souza@example.com', first_name='Ána', last_name='Souza')
+        self.bob = UserMaster.objects.create_user(email='bob@sample.org', first_name='Bob', last_name='Anand')
+        UserMaster.objects.create_user(email='carl@example.com', first_name='Carl', last_name='Jones')
+
+    def emails(self, **params):
+        response = self.client.get('/admin_urls/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['email'] for row in response.json()['data']['results']]
+
+    def test_prefix_and_exact_matches(self):
+        self.assertEqual(self.emails(search='an'), ['bob@sample.org', 'ana.souza@example.com'])
+        self.assertEqual(self.emails(search='ana sou'), ['ana.souza@example.com'])
+        self.assertEqual(self.emails(search='BOB@SAMPLE.ORG'), ['bob@sample.org'])
+        self.assertEqual(self.emails(search='zed'), [])
+
+    def test_tokens_follow_renames(self):
+        self.bob.last_name = 'Brown'
+        self.bob.save()
+        self.assertEqual(self.emails(search='anand'), [])
+        self.assertEqual(self.emails(search='brow'), ['bob@sample.org'])
+
+    def test_migration_backfills_existing_users(self):
+        UserSearchToken.objects.all().delete()
+        self.assertEqual(self.emails(search='ana'), [])
+        import_module('apis.V1.migrations.0019_usersearchtoken').backfill_tokens(django_apps, None)
+        self.assertEqual(self.emails(search='ana sou'), ['ana.souza@example.com'])
+
+    def test_category_filter_and_paging(self):
+        fx = seed(2)
+        self.assertEqual(self.emails(category_id=fx.categories[0].id), [fx.user.email])
+
+        first = self.client.get('/admin_urls/users/', {'search': 'an', 'page_size': 1}).json()['data']
+        second = self.client.get(first['next']).json()['data']
+        self.assertEqual([row['email'] for row in first['results'] + second['results']],
+                         ['bob@sample.org', 'ana.souza@example.com'])
+
+
+class ReplicaRoutingTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(2)
+        self.client.force_authenticate(user=self.fx.user)
+        self.router = ReplicaRouter()
+
+    def test_router_reads_replica_only_inside_replica_reads(self):
+        with mock.patch.dict(connections.databases, {'replica': connections.databases['default']}):
+            self.assertIsNone(self.router.db_for_read(ReportMaster))
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(ReportMaster), 'replica')
+                with primary_reads():
+                    self.assertIsNone(self.router.db_for_read(ReportMaster))
+                self.assertEqual(self.router.db_for_write(ReportMaster), 'default')
+            self.assertFalse(self.router.allow_migrate('replica', 'apis_v1'))
+        with replica_reads():
+            # no replica configured
+            self.assertIsNone(self.router.db_for_read(ReportMaster))
+
+    def routed_reads(self, method, path, data=None):
+        """Aliases the router picked for a request, with 'default' standing in for the replica."""
+        picked = []
+        original = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            picked.append(original(router, model, **hints))
+            return picked[-1]
+
+        with mock.patch('apis.V1.db_router.replica_alias', return_value='default'), \
+                mock.patch.object(ReplicaRouter, 'db_for_read', autospec=True, side_effect=spy):
+            response = getattr(self.client, method)(path, data, format='json')
+        self.assertLess(response.status_code, 400)
+        return picked
+
+    def test_read_only_views_use_replica_until_the_user_writes(self):
+        self.assertIn('default', self.routed_reads('get', '/app_apis/user_reports/'))
+        self.assertFalse(is_pinned(self.fx.user.pk))
+
+        self.assertNotIn('default', self.routed_reads('post', '/app_apis/cart_toggle/', {'cart_id': self.fx.carts[0].id}))
+        self.assertTrue(is_pinned(self.fx.user.pk))
+        self.assertNotIn('default', self.routed_reads('get', '/app_apis/user_reports/'))
+
+        self.client.force_authenticate(user=self.fx.other)
+        self.assertIn('default', self.routed_reads('get', '/app_apis/user_reports/'))
+
+    def test_catalog_is_rebuilt_from_primary(self):
+        cache.clear()
+        picked = self.routed_reads('get', '/app_apis/report-categories/')
+        # the ETag comes from the catalog version, so the only read is the rebuild on the primary
+        self.assertEqual(set(picked), {None})
+
+
+class ConditionalListTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(3)
+        cache.clear()
+
+    def test_catalog_revalidates_without_queries(self):
+        etag = self.client.get('/app_apis/report-categories/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/app_apis/report-categories/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReportsCategory.objects.get(pk=self.fx.categories[0].pk).save()
+        response = self.client.get('/app_apis/report-categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_private_list_hashes_the_page(self):
+        self.client.force_authenticate(user=self.fx.user)
+        response = self.client.get('/app_apis/cart_details/')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn('Authorization', response['Vary'])
+        again = self.client.get('/app_apis/cart_details/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((again.status_code, again['ETag']), (304, response['ETag']))
+
+        self.fx.carts[0].delete()
+        self.assertEqual(self.client.get('/app_apis/cart_details/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(5)
+        self.client.force_authenticate(user=UserMaster.objects.create_user(email='staff@example.com', is_staff=True))
+
+    def export(self, path, **params):
+        response = self.client.get(f'/admin_urls/exports/{path}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_BATCH_SIZE=2)
+    def test_csv_selected_fields_in_keyset_batches(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response, body = self.export('unlocks.csv', fields='id,email,amount')
+        rows = list(csv.reader(StringIO(body)))
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="unlocks-', response['Content-Disposition'])
+        self.assertEqual(rows[0], ['id', 'email', 'amount'])
+        ids = UserGeneratedReport.objects.order_by('id').values_list('id', flat=True)
+        self.assertEqual(rows[1:], [[str(pk), self.fx.user.email, '9'] for pk in ids])
+        # 5 rows in batches of 2: three reads, each bounded by LIMIT
+        reads = [sql for _, sql in recorder.queries if 'apis_v1_usergeneratedreport' in sql]
+        self.assertEqual(len(reads), 3)
+        self.assertTrue(all('LIMIT 2' in sql for sql in reads))
+
+    def test_ndjson_date_range(self):
+        old = UserMaster.objects.filter(pk=self.fx.other.pk)
+        old.update(date_joined='2020-01-01T00:00:00Z')
+        _, body = self.export('users.ndjson', fields='email,date_joined', until='2021-01-01')
+        self.assertEqual([json.loads(line) for line in body.splitlines()],
+                         [{'email': self.fx.other.email, 'date_joined': '2020-01-01T00:00:00Z'}])
+
+        _, body = self.export('users.ndjson', fields='email', since='2021-01-01')
+        self.assertNotIn(self.fx.other.email, body)
+        self.assertIn(self.fx.user.email, body)
+
+    def test_formula_cells_are_neutralized(self):
+        UserMaster.objects.filter(pk=self.fx.user.pk).update(first_name='=HYPERLINK("x")')
+        _, body = self.export('users.csv', fields='first_name')
+        self.assertIn('\'=HYPERLINK', body)
+
+    def test_rejections(self):
+        self.assertEqual(self.client.get('/admin_urls/exports/payments.csv').status_code, 404)
+        self.assertEqual(self.client.get('/admin_urls/exports/users.xlsx').status_code, 404)
+        self.assertEqual(self.client.get('/admin_urls/exports/users.csv', {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get('/admin_urls/exports/users.csv', {'since': 'yesterday'}).status_code, 400)
+        self.client.force_authenticate(user=self.fx.user)
+        self.assertEqual(self.client.get('/admin_urls/exports/users.csv').status_code, 403)
+
+
+class ResponseRenderingTests(APITestCase):
+
+    def setUp(self):
+        self.fx = seed(20)
+
+    def test_orjson_renderer_parses_like_json_renderer(self):
+        for data in (
+            {
+                'price': Decimal('9.50'), 'when': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+                'day': date(2024, 1, 2), 'label': gettext_lazy('Not found.'), 'text': 'caf\u00e9 \u2028 line',
+                1: [None, True, 1.5, 2 ** 40], 'id': UUID(int=1),
+            },
+            {'rows': [{'score': 1e16}, {'score': 1.5e-7}, {'score': 0.1}], 'total': -0.0},
+            {'amount': Decimal('1E+20'), 'rate': Decimal('0.00000015')},
+        ):
+            self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        response = self.client.get('/app_apis/reports/')
+        self.assertEqual(json.loads(response.content), json.loads(JSONRenderer().render(response.data)))
+
+    def test_large_payloads_are_gzipped_and_still_revalidate(self):
+        plain = self.client.get('/app_apis/reports/')
+        self.assertNotIn('Content-Encoding', plain)
+
+        response = self.client.get('/app_apis/reports/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        again = self.client.get('/app_apis/reports/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        refused = self.client.get('/app_apis/reports/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', refused)
+
+    def test_small_responses_and_exports(self):
+        response = self.client.get('/app_apis/offers/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), 1024)
+        self.assertNotIn('Content-Encoding', response)
+
+        self.client.force_authenticate(user=UserMaster.objects.create_user(email='staff@example.com', is_staff=True))
+        response = self.client.get('/admin_urls/exports/users.csv', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(self.fx.user.email, gzip.decompress(b''.join(response.streaming_content)).decode())
+
+    @skipUnless(render_utils.msgpack, "msgpack is not installed")
+    def test_msgpack_renderer(self):
+        data = {'price': Decimal('9.50'), 'rows': [{'id': 1, 'title': 'Report'}]}
+        self.assertEqual(render_utils.msgpack.unpackb(MessagePackRenderer().render(data)),
+                         json.loads(JSONRenderer().render(data)))
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    pass
+
+
+for _cls, _endpoints in ((AppQueryBudgetTests, APP_ENDPOINTS), (AdminQueryBudgetTests, ADMIN_ENDPOINTS)):
+    for _endpoint in _endpoints:
+        _test_name = 'test_' + _endpoint[0].replace(' ', '_')
+        setattr(_cls, _test_name, _make_budget_test(*_endpoint))
@@ -1,19 +1,169 @@
 import random
-from ..models import Ad, AdWatch
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from decimal import Decimal, InvalidOperation
+
+from ..models import Ad, AdWatch, UserGeneratedReport
 from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
 
+from .cache_utils import bump_version, get_version
+from .library_utils import mark_library_unlocked
 
-def get_ads_for_report(user, report):
-    watched_ad_ids = AdWatch.objects.filter(
-        user=user,
-        report=report
-    ).values_list('ad_id', flat=True)
+AD_INVENTORY_VERSION_KEY = 'ads:version'
+
+
+def price_to_amount(price):
+    """ReportMaster.price is free text; convert it to the integer amount stored on carts."""
+    try:
+        return int(Decimal(str(price).strip()))
+    except (InvalidOperation, ValueError):
+        return 0
+
+
+class AdInventory:
+    """Process-local snapshot of the active ads as two compact arrays.
+
+    ``ids`` is sorted, ``durations`` is parallel to it. The snapshot is
+    rebuilt when the shared ``ads:version`` counter moves (bumped by Ad
+    save/delete signals) or when it is older than AD_INVENTORY_MAX_AGE.
+    The version is checked at most every AD_INVENTORY_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = (array('q'), array('q'))
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < settings.AD_INVENTORY_CHECK_SECONDS:
+            return
+        version = get_version(AD_INVENTORY_VERSION_KEY)
+        self._checked_at = now
+        if version == self._version and now - self._loaded_at < settings.AD_INVENTORY_MAX_AGE:
+            return
+        with self._lock:
+            if version == self._version and now - self._loaded_at < settings.AD_INVENTORY_MAX_AGE:
+                return
+            ids, durations = array('q'), array('q')
+            for ad_id, duration in Ad.objects.filter(is_active=True).order_by('id').values_list('id', 'duration'):
+                ids.append(ad_id)
+                durations.append(duration)
+            self._snapshot = (ids, durations)
+            self._version = version
+            self._loaded_at = now
+
+    def invalidate(self):
+        self._version = None
+
+    def sample(self, k, exclude=()):
+        """Draw up to ``k`` random active ad ids not in ``exclude``; O(k + len(exclude))."""
+        self._refresh()
+        ids, _ = self._snapshot
+        want = min(len(ids), k + len(exclude))
+        picked = []
+        for index in random.sample(range(len(ids)), want):
+            if ids[index] not in exclude:
+                picked.append(ids[index])
+                if len(picked) == k:
+                    break
+        return picked
+
+    def duration(self, ad_id):
+        """Duration of an active ad, or None if it is not (or no longer) active."""
+        self._refresh()
+        ids, durations = self._snapshot
+        index = bisect_left(ids, ad_id)
+        if index < len(ids) and ids[index] == ad_id:
+            return durations[index]
+        return None
+
+
+ad_inventory = AdInventory()
 
-    available_ads = Ad.objects.filter(
-        is_active=True
-    ).exclude(id__in=watched_ad_ids)
 
-    ads = list(available_ads)
-    random.shuffle(ads)
+def bump_ad_inventory():
+    bump_version(AD_INVENTORY_VERSION_KEY)
+    ad_inventory.invalidate()
+
+
+def _watched_key(user_id, report_id):
+    return f'adwatch:{user_id}:{report_id}'
+
+
+def get_watched_ad_ids(user_id, report_id):
+    """Ad ids this user already watched for the report, cached per (user, report)."""
+    cache = caches[settings.CATALOG_CACHE_ALIAS]
+    key = _watched_key(user_id, report_id)
+    watched = cache.get(key)
+    if watched is None:
+        watched = frozenset(
+            AdWatch.objects.filter(user_id=user_id, report_id=report_id).values_list('ad_id', flat=True)
+        )
+        cache.set(key, watched, settings.AD_WATCHED_CACHE_SECONDS)
+    return watched
+
+
+def remember_watched_ad(user_id, report_id, ad_id):
+    cache = caches[settings.CATALOG_CACHE_ALIAS]
+    key = _watched_key(user_id, report_id)
+    watched = cache.get(key)
+    if watched is not None:
+        cache.set(key, watched | {ad_id}, settings.AD_WATCHED_CACHE_SECONDS)
+
+
+def record_ad_watch(user_id, report_id, ad_id, duration):
+    """Count a completed ad towards the user's report and unlock it at the threshold.
+
+    The watch row is unique per (user, report, ad), so a repeated completion
+    is a no-op. Counters move with one conditional UPDATE that also flips
+    ``is_locked`` once ``ads_count`` reaches ADS_REQUIRED_PER_REPORT, so
+    concurrent completions can neither lose an increment nor unlock twice.
+
+    Returns ``(ads_count, is_locked)``, or None when the user has no such report.
+    """
+    ugr = UserGeneratedReport.objects.filter(user_id=user_id, report_id=report_id)
+    unlocks = Q(is_locked=True, ads_count__gte=settings.ADS_REQUIRED_PER_REPORT - 1)
+    try:
+        with transaction.atomic():
+            AdWatch.objects.create(
+                user_id=user_id, report_id=report_id, ad_id=ad_id, completed=True, watched_seconds=duration,
+            )
+            updated = ugr.update(
+                ads_count=F('ads_count') + 1,
+                ads_duration=F('ads_duration') + duration,
+                is_locked=Case(When(unlocks, then=Value(False)), default=F('is_locked')),
+                unlocked_mode=Case(When(unlocks, then=Value('Ads')), default=F('unlocked_mode')),
+                unlocked_on=Case(When(unlocks, then=Value(timezone.now())), default=F('unlocked_on')),
+                credits_used=Case(When(unlocks, then=Value(9)), default=F('credits_used')),
+                updated_on=timezone.now(),
+            )
+            if not updated:
+                # no generated report to count towards; drop the watch row too
+                raise UserGeneratedReport.DoesNotExist
+    except IntegrityError:
+        pass  # already counted
+    except UserGeneratedReport.DoesNotExist:
+        return None
+    progress = ugr.values_list('ads_count', 'is_locked').first()
+    if progress and not progress[1]:
+        mark_library_unlocked(user_id, report_id)
+    return progress
+
+
+def get_ads_for_report(user, report):
+    watched_ad_ids = get_watched_ad_ids(user.pk, report.pk)
+    ad_ids = ad_inventory.sample(settings.ADS_REQUIRED_PER_REPORT, exclude=watched_ad_ids)
+    if not ad_ids:
+        return []
 
-    return ads[:settings.ADS_REQUIRED_PER_REPORT]
+    ads = Ad.objects.in_bulk(ad_ids)
+    return [ads[ad_id] for ad_id in ad_ids if ad_id in ads]
@@ -0,0 +1,125 @@
+"""JWT authentication that serves ``request.user`` from a per-worker cache.
+
+``JWTAuthentication`` loads the user row by primary key on every request.
+``CachedJWTAuthentication`` keeps recently seen users in a small TTL LRU
+inside each worker. Entries are tagged with a per-user version kept in the
+shared cache; ``UserMaster`` save/delete signals bump it, so every worker
+drops a changed user on its next request. ``QuerySet.update()`` sends no
+signals: call ``invalidate_cached_user`` after one, or wait out the TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache_utils import aget_version, bump_version, get_version
+
+
+class UserCache:
+    """Thread-safe LRU of ``pk -> (version, expires_at, user)``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, pk, version):
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is None:
+                return None
+            cached_version, expires_at, user = entry
+            if cached_version != version or expires_at < time.monotonic():
+                del self._entries[pk]
+                return None
+            self._entries.move_to_end(pk)
+            return user
+
+    def put(self, pk, version, user):
+        with self._lock:
+            self._entries[pk] = (version, time.monotonic() + settings.AUTH_USER_CACHE_SECONDS, user)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def _version_key(pk):
+    return f'auth:user:{pk}:version'
+
+
+def invalidate_cached_user(pk):
+    user_cache.discard(pk)
+    bump_version(_version_key(pk), settings.AUTH_USER_CACHE_ALIAS)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        version = get_version(_version_key(user_id), settings.AUTH_USER_CACHE_ALIAS)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.put(user_id, version, user)
+        else:
+            # the revoke claim is per token, so it is checked on every hit
+            self._check_revoked(validated_token, user)
+
+        # views may modify request.user; never hand out the shared instance
+        return copy.copy(user)
+
+    def _check_revoked(self, validated_token, user):
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for plain Django async views; the token checks are CPU only."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = await aget_version(_version_key(user_id), settings.AUTH_USER_CACHE_ALIAS)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code='user_not_found')
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code='user_inactive')
+            user_cache.put(user_id, version, user)
+        self._check_revoked(validated_token, user)
+        return copy.copy(user)
@@ -0,0 +1,174 @@
+"""Versioned caching helpers, used for the public catalog (categories and reports).
+
+Every entry key embeds the current catalog version. Admin writes bump the
+version through model signals, so all workers sharing the cache stop
+reading old entries at once; stale entries simply expire.
+"""
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from ..db_router import primary_reads
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_STATS_KEYS = {'hit': 'catalog:stats:hits', 'miss': 'catalog:stats:misses'}
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def get_version(key, alias=None):
+    """Current value of an invalidation version counter shared by all workers."""
+    cache = caches[alias or settings.CATALOG_CACHE_ALIAS]
+    version = cache.get(key)
+    if version is None:
+        # time-based seed so a flushed cache never reuses an old version
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key, alias=None):
+    cache = caches[alias or settings.CATALOG_CACHE_ALIAS]
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(key, alias=None):
+    cache = caches[alias or settings.CATALOG_CACHE_ALIAS]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+async def aget_catalog_version():
+    return await aget_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def _count(outcome):
+    cache = _cache()
+    key = CATALOG_STATS_KEYS[outcome]
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def _acount(outcome):
+    cache = _cache()
+    key = CATALOG_STATS_KEYS[outcome]
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def catalog_cache_stats():
+    """Shared hit/miss counters across all workers."""
+    values = _cache().get_many(CATALOG_STATS_KEYS.values())
+    hits = values.get(CATALOG_STATS_KEYS['hit'], 0)
+    misses = values.get(CATALOG_STATS_KEYS['miss'], 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else None}
+
+
+def reset_catalog_cache_stats():
+    _cache().delete_many(CATALOG_STATS_KEYS.values())
+
+
+def _entry_key(version, namespace, params):
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f'catalog:{version}:{namespace}:{digest}'
+
+
+def cached_catalog(namespace, params, builder):
+    """Return ``(data, hit)`` for the catalog slice identified by ``params``.
+
+    On a miss only the caller that wins the lock runs ``builder``; the
+    others poll briefly for its result instead of rebuilding in parallel.
+    ``builder`` reads the primary: the version is bumped on commit, and a
+    lagging replica would store the old catalog under the new version.
+    """
+    cache = _cache()
+    key = _entry_key(get_catalog_version(), namespace, params)
+
+    data = cache.get(key)
+    if data is not None:
+        _count('hit')
+        return data, True
+
+    _count('miss')
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.CATALOG_CACHE_LOCK_SECONDS):
+        try:
+            with primary_reads():
+                data = builder()
+            cache.set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return data, False
+
+    deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        data = cache.get(key)
+        if data is not None:
+            return data, False
+        if cache.get(lock_key) is None:
+            break
+
+    # the builder failed or is too slow; serve from the database
+    with primary_reads():
+        return builder(), False
+
+
+async def acached_catalog(namespace, params, builder):
+    """``cached_catalog`` for async views: same keys and entries, ``builder`` is awaited."""
+    cache = _cache()
+    key = _entry_key(await aget_version(CATALOG_VERSION_KEY), namespace, params)
+
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount('hit')
+        return data, True
+
+    await _acount('miss')
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, settings.CATALOG_CACHE_LOCK_SECONDS):
+        try:
+            with primary_reads():
+                data = await builder()
+            await cache.aset(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        return data, False
+
+    deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        data = await cache.aget(key)
+        if data is not None:
+            return data, False
+        if await cache.aget(lock_key) is None:
+            break
+
+    with primary_reads():
+        return await builder(), False
@@ -0,0 +1,106 @@
+"""Conditional GET support (ETag) for list endpoints.
+
+Neither kind of ETag needs a query of its own. Catalog lists (views with a
+``catalog_namespace``) take theirs from the catalog version, so a matching
+``If-None-Match`` is answered with 304 before the catalog cache is even
+read. Other lists hash the page they have just fetched. That still runs the
+page query, but skips rendering and sending the body, and never aggregates
+over the whole filtered set.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache_utils import aget_catalog_version, get_catalog_version
+from .render_utils import dumps
+
+
+def _etag(request, *parts):
+    parts = [request.get_host(), request.get_full_path(), getattr(request, 'accepted_media_type', ''), *parts]
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def catalog_etag(request):
+    """ETag of a catalog list: changes whenever the catalog version is bumped."""
+    return _etag(request, get_catalog_version())
+
+
+async def acatalog_etag(request):
+    return _etag(request, await aget_catalog_version())
+
+
+def page_etag(request, data, private=False):
+    """ETag of a list response from the ``data`` it is about to render."""
+    digest = hashlib.md5(dumps(data)).hexdigest()
+    return _etag(request, digest, getattr(request.user, 'pk', None) if private else None)
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    # weak comparison (RFC 9110 13.1.2): CompressionMiddleware sends compressed bodies with W/ ETags
+    etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+    return '*' in etags or etag in etags
+
+
+def set_validator_headers(response, etag, private=False):
+    response['ETag'] = etag
+    if private:
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Authorization',))
+    else:
+        response['Cache-Control'] = 'no-cache'
+
+
+def conditional_list(view_func):
+    """Wrap a viewset ``list`` so unchanged results answer 304 Not Modified."""
+
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        if etag is not None and etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        response = view_func(self, request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if etag is None:
+            etag = page_etag(request, response.data, self.private_validators)
+            if etag_matches(request, etag):
+                return self._not_modified(etag)
+        self._set_validator_headers(response, etag)
+        return response
+
+    return wrapper
+
+
+class ConditionalListMixin:
+    """Validator plumbing for viewsets whose ``list`` is wrapped by ``conditional_list``.
+
+    Views with a ``catalog_namespace`` get the catalog ETag up front; the
+    rest get a hash of the page. Per-user endpoints set
+    ``private_validators`` so the user id is part of the ETag.
+    """
+    catalog_namespace = None
+    private_validators = False
+
+    def get_list_etag(self, request):
+        """ETag known before the view runs, or ``None`` to hash the response."""
+        return catalog_etag(request) if self.catalog_namespace else None
+
+    def _not_modified(self, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        self._set_validator_headers(response, etag)
+        return response
+
+    def _set_validator_headers(self, response, etag):
+        set_validator_headers(response, etag, self.private_validators)
+
+    @conditional_list
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
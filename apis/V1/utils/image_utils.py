@@ -0,0 +1,133 @@
+"""Fixed-width WebP/JPEG derivatives of category images.
+
+Derivatives are stored next to the original (``categories/foo.png`` ->
+``categories/foo_320w.webp``) and recorded on
+``ReportsCategory.image_variants`` as::
+
+    {"source": "categories/foo.png",
+     "webp": {"320": "categories/foo_320w.webp", ...},
+     "jpeg": {"320": "categories/foo_320w.jpg", ...}}
+
+``source`` ties the map to the image it was built from, so a replaced
+image never shows the previous image's derivatives. Generation runs on
+a small worker pool after the upload commits (IMAGE_DERIVATIVE_WORKERS=0
+runs it inline); ``build_image_derivatives`` backfills existing rows.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from ..models import ReportsCategory
+from .cache_utils import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    # format key: (Pillow format, extension, save options)
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variants_for(category):
+    """The derivative map of ``category`` if it matches its current image, else {}."""
+    variants = category.image_variants or {}
+    if not category.image or variants.get('source') != category.image.name:
+        return {}
+    return {key: value for key, value in variants.items() if key in FORMATS}
+
+
+def target_widths(width):
+    """Configured widths narrower than the original; never upscale."""
+    return [w for w in sorted(settings.IMAGE_DERIVATIVE_WIDTHS) if w < width] or [width]
+
+
+def _encode(image, fmt):
+    pillow_format, _, options = FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # JPEG has no alpha: flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def render_derivatives(field_file):
+    """Build every derivative of ``field_file`` and save it to the same storage.
+
+    Returns the variants map (without ``source``).
+    """
+    storage = field_file.storage
+    stem = os.path.splitext(field_file.name)[0]
+    with field_file.open('rb') as handle, Image.open(handle) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+        variants = {fmt: {} for fmt in FORMATS}
+        for width in target_widths(original.width):
+            height = max(1, round(original.height * width / original.width))
+            resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            for fmt, (_, extension, _) in FORMATS.items():
+                name = f'{stem}_{width}w.{extension}'
+                if storage.exists(name):
+                    storage.delete(name)
+                variants[fmt][str(width)] = storage.save(name, ContentFile(_encode(resized, fmt)))
+    return variants
+
+
+def _stale_files(old, new):
+    keep = {name for fmt in FORMATS for name in new.get(fmt, {}).values()}
+    return [name for fmt in FORMATS for name in old.get(fmt, {}).values() if name not in keep]
+
+
+def generate_category_derivatives(category_id, force=False):
+    """Create the derivatives of one category image; True if the row was updated."""
+    category = ReportsCategory.objects.filter(pk=category_id).only('image', 'image_variants').first()
+    if category is None or not category.image:
+        return False
+    if not force and variants_for(category):
+        return False
+
+    source = category.image.name
+    variants = render_derivatives(category.image)
+    # only record the map if the image was not replaced meanwhile
+    updated = ReportsCategory.objects.filter(pk=category_id, image=source).update(
+        image_variants={'source': source, **variants}, updated_on=timezone.now(),
+    )
+    if updated:
+        storage = category.image.storage
+        for name in _stale_files(category.image_variants or {}, variants):
+            storage.delete(name)
+        bump_catalog_version()
+    return bool(updated)
+
+
+@lru_cache(maxsize=None)
+def _executor():
+    return ThreadPoolExecutor(max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='derivatives')
+
+
+def _run(category_id):
+    try:
+        generate_category_derivatives(category_id)
+    except Exception:
+        logger.exception("Image derivatives failed for category %s", category_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_category_derivatives(category_id):
+    if settings.IMAGE_DERIVATIVE_WORKERS <= 0:
+        generate_category_derivatives(category_id)
+    else:
+        _executor().submit(_run, category_id)
@@ -0,0 +1,246 @@
+"""Bulk catalog import from a CSV manifest, optionally zipped with the report files.
+
+Manifest columns: ``title`` (required), ``category_id`` or ``category``
+(the category name), ``description``, ``price``, ``is_active`` and ``file``,
+a path inside the ZIP. A ZIP carries ``manifest.csv`` (or its only
+top-level ``.csv``) next to the files.
+
+Validation is set-based: all categories are resolved in one query and all
+existing (category, title) pairs in one more, so the cost does not grow
+with a query per row. The import is all-or-nothing: any row error means
+nothing is written. Files are streamed from the archive into the blob
+storage, then reports are inserted with ``bulk_create`` in batches.
+``bulk_create`` sends no model signals, so blob refcounts and the catalog
+version are updated here.
+"""
+import csv
+import io
+import mimetypes
+import posixpath
+import zipfile
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Q
+
+from ..models import MediaBlob, ReportMaster, ReportsCategory
+from ..storage import blob_storage
+from .cache_utils import bump_catalog_version
+
+MANIFEST_NAME = 'manifest.csv'
+MAX_FILE_BYTES = 50 * 1024 * 1024  # same limit as ReportMasterSerializer.validate_file
+TRUE_VALUES = {'', '1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+class CatalogImportError(ValueError):
+    """The upload itself is unusable (not a CSV/ZIP, no manifest, too many rows)."""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    files: int = 0
+    dry_run: bool = False
+    errors: list = field(default_factory=list)  # [{'row': line number, 'errors': [...]}]
+
+    def as_dict(self):
+        return {
+            'rows': self.rows, 'created': self.created, 'files': self.files,
+            'dry_run': self.dry_run, 'errors': self.errors,
+        }
+
+
+@dataclass
+class _Row:
+    line: int
+    title: str
+    category_id: int = None
+    description: str = None
+    price: str = ''
+    is_active: bool = True
+    member: str = None
+    errors: list = field(default_factory=list)
+
+
+def _open_manifest(upload):
+    """Return ``(text stream, ZipFile or None)`` for a CSV or ZIP file object."""
+    if zipfile.is_zipfile(upload):
+        upload.seek(0)
+        archive = zipfile.ZipFile(upload)
+        names = archive.namelist()
+        if MANIFEST_NAME not in names:
+            candidates = [name for name in names if name.lower().endswith('.csv') and '/' not in name]
+            if len(candidates) != 1:
+                raise CatalogImportError(f"the ZIP must contain {MANIFEST_NAME}")
+            manifest = candidates[0]
+        else:
+            manifest = MANIFEST_NAME
+        return io.TextIOWrapper(archive.open(manifest), encoding='utf-8-sig', newline=''), archive
+    upload.seek(0)
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''), None
+
+
+def _read_rows(stream):
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or 'title' not in reader.fieldnames:
+        raise CatalogImportError("the manifest needs a header row with at least a 'title' column")
+    rows = []
+    try:
+        for record in reader:
+            if len(rows) >= settings.IMPORT_MAX_ROWS:
+                raise CatalogImportError(f"the manifest has more than {settings.IMPORT_MAX_ROWS} rows")
+            rows.append((reader.line_num, {key: (value or '').strip() for key, value in record.items() if key}))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise CatalogImportError(f"unreadable manifest: {exc}")
+    return rows
+
+
+def _parse(line, record, members):
+    row = _Row(line=line, title=record.get('title', ''))
+    if len(row.title) < 3:
+        row.errors.append("Title must be at least 3 characters long.")
+    elif len(row.title) > ReportMaster._meta.get_field('title').max_length:
+        row.errors.append("Title is too long.")
+
+    row.description = record.get('description') or None
+    row.price = record.get('price', '')
+    if len(row.price) > ReportMaster._meta.get_field('price').max_length:
+        row.errors.append("Price is too long.")
+
+    active = record.get('is_active', '').lower()
+    if active not in TRUE_VALUES | FALSE_VALUES:
+        row.errors.append(f"is_active must be true or false, not {record['is_active']!r}.")
+    row.is_active = active in TRUE_VALUES
+
+    member = record.get('file')
+    if member:
+        member = posixpath.normpath(member.replace('\\', '/')).lstrip('/')
+        if members is None:
+            row.errors.append("A file column needs the files uploaded in a ZIP.")
+        elif member not in members:
+            row.errors.append(f"File {member!r} is not in the ZIP.")
+        elif members[member].file_size > MAX_FILE_BYTES:
+            row.errors.append("File size must not exceed 50MB.")
+        else:
+            row.member = member
+    return row
+
+
+def _resolve_categories(rows, records):
+    """Set ``category_id`` on every row with one query for all categories named or referenced."""
+    ids, names = set(), set()
+    for record in records:
+        raw_id, name = record.get('category_id'), record.get('category')
+        if raw_id:
+            if raw_id.isdigit():
+                ids.add(int(raw_id))
+        elif name:
+            names.add(name)
+
+    found = ReportsCategory.objects.filter(is_deleted=False).filter(
+        Q(id__in=ids) | Q(category__in=names)
+    ).values_list('id', 'category')
+    known_ids, by_name = set(), {}
+    for category_id, name in found:
+        known_ids.add(category_id)
+        by_name.setdefault(name, []).append(category_id)
+
+    for row, record in zip(rows, records):
+        raw_id, name = record.get('category_id'), record.get('category')
+        if raw_id:
+            if raw_id.isdigit() and int(raw_id) in known_ids:
+                row.category_id = int(raw_id)
+            else:
+                row.errors.append("Selected category does not exist or is deleted.")
+        elif name:
+            matches = by_name.get(name, [])
+            if len(matches) == 1:
+                row.category_id = matches[0]
+            else:
+                row.errors.append(f"Category {name!r} {'is ambiguous' if matches else 'does not exist'}; use category_id.")
+        else:
+            row.errors.append("category_id or category is required.")
+
+
+def _flag_duplicates(rows):
+    """Reject titles already in the category, in the database or earlier in the manifest."""
+    valid = [row for row in rows if not row.errors]
+    category_ids = {row.category_id for row in valid}
+    titles = sorted({row.title for row in valid})
+    existing = set()
+    # chunked: a 50k-row manifest would exceed SQLite's bound-parameter limit
+    for start in range(0, len(titles), settings.IMPORT_BATCH_SIZE):
+        existing.update(ReportMaster.objects.filter(
+            report_category_id__in=category_ids, title__in=titles[start:start + settings.IMPORT_BATCH_SIZE],
+        ).values_list('report_category_id', 'title'))
+    for row in valid:
+        key = (row.category_id, row.title)
+        if key in existing:
+            row.errors.append("A report with this title already exists in the category.")
+        existing.add(key)
+
+
+def _store_files(archive, rows):
+    """Stream each distinct ZIP member into the blob storage; returns member -> stored name."""
+    storage = blob_storage()
+    upload_to = ReportMaster._meta.get_field('file').upload_to
+    stored = {}
+    for member in dict.fromkeys(row.member for row in rows if row.member):
+        with archive.open(member) as handle:
+            content = File(handle, name=posixpath.basename(member))
+            content.content_type = mimetypes.guess_type(member)[0]
+            stored[member] = storage.save(posixpath.join(upload_to, content.name), content)
+    return stored
+
+
+def _count_blob_refs(names):
+    """One UPDATE per distinct reference count instead of one per report."""
+    by_count = {}
+    for name, count in Counter(names).items():
+        by_count.setdefault(count, []).append(name)
+    for count, blob_names in by_count.items():
+        MediaBlob.objects.filter(name__in=blob_names).update(refcount=F('refcount') + count, dereferenced_on=None)
+
+
+def import_catalog(upload, dry_run=False, batch_size=None):
+    """Validate and import the manifest in ``upload`` (a binary file object)."""
+    stream, archive = _open_manifest(upload)
+    try:
+        parsed = _read_rows(stream)
+        members = {info.filename: info for info in archive.infolist() if not info.is_dir()} if archive else None
+        records = [record for _, record in parsed]
+        rows = [_parse(line, record, members) for line, record in parsed]
+        _resolve_categories(rows, records)
+        _flag_duplicates(rows)
+
+        result = ImportResult(rows=len(rows), dry_run=dry_run)
+        result.errors = [{'row': row.line, 'errors': row.errors} for row in rows if row.errors]
+        if dry_run or result.errors or not rows:
+            return result
+
+        # files first: blobs left behind by a failed insert have refcount 0 and are collected by dedupe_media --gc
+        stored = _store_files(archive, rows) if archive else {}
+        result.files = len(stored)
+        with transaction.atomic():
+            ReportMaster.objects.bulk_create(
+                [
+                    ReportMaster(
+                        report_category_id=row.category_id, title=row.title, description=row.description,
+                        price=row.price, is_active=row.is_active, file=stored.get(row.member),
+                    )
+                    for row in rows
+                ],
+                batch_size=batch_size or settings.IMPORT_BATCH_SIZE,
+            )
+            _count_blob_refs([stored[row.member] for row in rows if row.member])
+            transaction.on_commit(bump_catalog_version)
+        result.created = len(rows)
+        return result
+    finally:
+        if archive:
+            archive.close()
@@ -0,0 +1,61 @@
+"""Maintenance of the materialized user library (``UserLibraryEntry``).
+
+Rows are rebuilt from ``UserGeneratedReport`` with the same builder the
+library used to run on every read, and upserted in batches. Call
+``sync_library`` after any write that changes what a library row shows;
+the signals in ``signals.py`` cover model saves, the views call it after
+their bulk writes.
+"""
+from django.db import connection
+from django.utils import timezone
+
+from ..models import UserLibraryEntry
+from .row_utils import user_report_rows, user_report_values
+
+LIBRARY_FIELDS = ('user', 'report', 'title', 'amount', 'image', 'is_locked')
+SYNC_BATCH_SIZE = 500
+
+
+def _upsert(rows, user_ids, entry_model):
+    entries = [
+        entry_model(
+            ugr_id=row['id'],
+            user_id=user_ids[row['id']],
+            report_id=row['report_id'],
+            title=row['title'],
+            amount=row['amount'],
+            image=row['image'],
+            is_locked=row['is_locked'],
+            updated_on=timezone.now(),
+        )
+        for row in rows
+    ]
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    target = {'unique_fields': ['ugr']} if connection.features.supports_update_conflicts_with_target else {}
+    entry_model.objects.bulk_create(
+        entries, update_conflicts=True, update_fields=[*LIBRARY_FIELDS, 'updated_on'], **target
+    )
+
+
+def sync_library(queryset, entry_model=UserLibraryEntry):
+    """Create or refresh the library rows of the ``UserGeneratedReport`` rows in ``queryset``.
+
+    Returns the number of rows written. Migrations pass their historical
+    ``entry_model`` (and a queryset of the historical report model).
+    """
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(user_report_values(queryset.filter(id__gt=last_id).order_by('id'))[:SYNC_BATCH_SIZE])
+        if batch:
+            _upsert(user_report_rows(batch), {row['id']: row['user_id'] for row in batch}, entry_model)
+            written += len(batch)
+            last_id = batch[-1]['id']
+        if len(batch) < SYNC_BATCH_SIZE:
+            return written
+
+
+def mark_library_unlocked(user_id, report_id):
+    UserLibraryEntry.objects.filter(user_id=user_id, report_id=report_id, is_locked=True).update(
+        is_locked=False, updated_on=timezone.now(),
+    )
@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Short aliases accepted by ``send_outbox --backend``.
+BACKEND_ALIASES = {
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+    'locmem': 'django.core.mail.backends.locmem.EmailBackend',
+    'dummy': 'django.core.mail.backends.dummy.EmailBackend',
+}
+
+
+def _outbox_fields(to_email, subject, text_template, html_template, context, from_email):
+    context = context or {}
+    return {
+        'to_email': to_email,
+        'from_email': from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+        'subject': subject,
+        'body_text': render_to_string(text_template, context),
+        'body_html': render_to_string(html_template, context) if html_template else None,
+    }
+
+
+def queue_email(to_email, subject, text_template, html_template=None, context=None, from_email=None):
+    """Render the templates and store the message in the outbox.
+
+    Returns immediately; delivery happens in the ``send_outbox`` worker.
+    """
+    return EmailOutbox.objects.create(
+        **_outbox_fields(to_email, subject, text_template, html_template, context, from_email)
+    )
+
+
+async def aqueue_email(to_email, subject, text_template, html_template=None, context=None, from_email=None):
+    """``queue_email`` for async views."""
+    return await EmailOutbox.objects.acreate(
+        **_outbox_fields(to_email, subject, text_template, html_template, context, from_email)
+    )
+
+
+def build_message(outbox, connection=None):
+    """Turn an outbox row back into an ``EmailMultiAlternatives``."""
+    message = EmailMultiAlternatives(
+        subject=outbox.subject,
+        body=outbox.body_text,
+        from_email=outbox.from_email,
+        to=[outbox.to_email],
+        connection=connection,
+    )
+    if outbox.body_html:
+        message.attach_alternative(outbox.body_html, "text/html")
+    return message
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base ... capped at OUTBOX_RETRY_MAX_SECONDS."""
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size):
+    """Lease up to ``batch_size`` due messages to this worker.
+
+    Rows are locked only long enough to push ``next_attempt_on`` past the
+    lease, so several workers can run side by side and a crashed worker's
+    messages become due again once the lease runs out.
+    """
+    now = timezone.now()
+    lock_kwargs = {}
+    if connection.features.has_select_for_update_skip_locked:
+        lock_kwargs['skip_locked'] = True
+
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(**lock_kwargs)
+            .filter(status='PENDING', next_attempt_on__lte=now)
+            .order_by('next_attempt_on')[:batch_size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                next_attempt_on=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+    return rows
+
+
+def deliver_batch(mail_connection, batch_size=50):
+    """Send one batch of due messages over an already created connection.
+
+    The connection is opened if needed and left open, so consecutive
+    batches reuse the same SMTP session. Returns ``(sent, failed)``.
+    """
+    rows = claim_batch(batch_size)
+    sent = failed = 0
+    if not rows:
+        return sent, failed
+
+    for row in rows:
+        try:
+            mail_connection.open()
+            mail_connection.send_messages([build_message(row, connection=mail_connection)])
+        except Exception as exc:  # SMTP, socket and backend errors alike
+            failed += 1
+            _mark_failed(row, exc)
+            # The session may be broken; the next send reopens it.
+            try:
+                mail_connection.close()
+            except Exception:
+                pass
+        else:
+            sent += 1
+            EmailOutbox.objects.filter(id=row.id).update(
+                status='SENT',
+                attempts=row.attempts + 1,
+                sent_on=timezone.now(),
+                last_error=None,
+            )
+    return sent, failed
+
+
+def _mark_failed(row, exc):
+    attempts = row.attempts + 1
+    logger.warning("Outbox delivery to %s failed (attempt %s): %s", row.to_email, attempts, exc)
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        EmailOutbox.objects.filter(id=row.id).update(
+            status='FAILED', attempts=attempts, last_error=str(exc)
+        )
+        return
+    EmailOutbox.objects.filter(id=row.id).update(
+        attempts=attempts,
+        last_error=str(exc),
+        next_attempt_on=timezone.now() + retry_delay(attempts),
+    )
@@ -0,0 +1,147 @@
+"""Serving stored media with byte ranges, validators and web-server offload.
+
+``media_response`` answers a GET for one stored file:
+
+* ``If-None-Match`` / ``If-Modified-Since`` -> 304
+* ``Range: bytes=a-b`` (single range; ``If-Range`` honoured) -> 206
+* otherwise the whole file -> 200
+
+With ``MEDIA_OFFLOAD`` set to ``'x-accel'`` (nginx) or ``'x-sendfile'``
+(Apache/lighttpd), the checks stay in Django and the bytes are handed to
+the web server, which does its own range handling; the worker returns
+immediately.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    return quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+
+
+def _file_meta(name, path, blob):
+    """``(size, mtime, etag, content_type)`` from the MediaBlob row, or a stat() without one."""
+    if blob is not None:
+        return blob.size, blob.created_on.timestamp(), quote_etag(blob.sha256), blob.content_type
+    stat = os.stat(path)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return stat.st_size, stat.st_mtime, file_etag(stat), content_type
+
+
+def parse_range(header, size):
+    """``(start, end)`` inclusive for a single satisfiable range, None to ignore
+    the header (absent, malformed or multi-range), or ``False`` if unsatisfiable."""
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # RFC 9110 14.1.1: an inverted range is invalid, so the header is ignored
+        return None
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def iter_file_range(path, start, length):
+    chunk_size = settings.MEDIA_CHUNK_SIZE
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_applies(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def _offload(name, path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD == 'x-accel':
+        response['X-Accel-Redirect'] = f"{settings.MEDIA_ACCEL_PREFIX.rstrip('/')}/{name.lstrip('/')}"
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def media_response(request, field_file, cache_control='private, max-age=3600', blob=None):
+    """Response for the stored file behind ``field_file`` (a ``FieldFile``).
+
+    Pass the file's ``MediaBlob`` when there is one: size, validators and
+    content type then come from the database and the file is not stat()ed.
+    """
+    storage, name = field_file.storage, field_file.name
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # remote storage (S3 and the like) serves ranges itself
+        return HttpResponseRedirect(storage.url(name))
+
+    try:
+        size, mtime, etag, content_type = _file_meta(name, path, blob)
+    except FileNotFoundError:
+        return HttpResponse(status=404)
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_OFFLOAD:
+        response = _offload(name, path, content_type)
+    else:
+        byte_range = None
+        if _range_applies(request, etag, mtime):
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range is None:
+            try:
+                handle = open(path, 'rb')
+            except FileNotFoundError:
+                return HttpResponse(status=404)
+            response = FileResponse(handle, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(path, start, end - start + 1), status=206, content_type=content_type,
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = cache_control
+    return response
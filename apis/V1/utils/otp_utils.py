@@ -0,0 +1,136 @@
+import hashlib
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import OtpCode
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class BaseOtpBackend:
+    """Storage for one-time codes. ``consume`` must succeed at most once per code."""
+
+    def issue(self, email, code, ttl=None):
+        raise NotImplementedError
+
+    def consume(self, email, code):
+        raise NotImplementedError
+
+    def get_live(self, email):
+        """Return ``{'code', 'issued_at', 'last_sent_at', 'expires_at'}`` for the live code, or None."""
+        raise NotImplementedError
+
+    def mark_sent(self, email):
+        """Record that the live code was e-mailed again; the resend cooldown runs from here."""
+        raise NotImplementedError
+
+    @property
+    def ttl(self):
+        return settings.OTP_TTL_SECONDS
+
+
+class CacheOtpBackend(BaseOtpBackend):
+    """Keep the live code per email in the cache; expiry is the cache TTL.
+
+    Three keys per email: the entry (code and timestamps), the time of the
+    last send, and a ticket named after the code itself. ``consume`` deletes
+    the ticket and wins only if that delete removed it, so a code works once
+    and a reissue in between can neither be removed nor matched by the old
+    code. ``issue`` deletes the previous code's ticket.
+
+    Needs a cache shared by all workers (redis/memcached) in production.
+    """
+    key_prefix = 'otp'
+
+    def __init__(self):
+        self.cache = caches[settings.OTP_CACHE_ALIAS]
+
+    def _key(self, email):
+        digest = hashlib.sha1(normalize_email(email).encode()).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def _ticket_key(self, email, code):
+        key = self._key(email)
+        return f'{key}:{hashlib.sha256(f"{key}:{code}".encode()).hexdigest()}'
+
+    def issue(self, email, code, ttl=None):
+        ttl = ttl or self.ttl
+        key = self._key(email)
+        previous = self.cache.get(key)
+        now = timezone.now()
+        entry = {'code': code, 'issued_at': now, 'expires_at': now + timedelta(seconds=ttl)}
+        self.cache.set_many({key: entry, f'{key}:sent': now, self._ticket_key(email, code): 1}, ttl)
+        if previous and previous['code'] != code:
+            self.cache.delete(self._ticket_key(email, previous['code']))
+
+    def get_live(self, email):
+        key = self._key(email)
+        values = self.cache.get_many([key, f'{key}:sent'])
+        entry = values.get(key)
+        # a consumed code keeps its entry until expiry; it is live while its ticket exists
+        if not entry or not self.cache.has_key(self._ticket_key(email, entry['code'])):
+            return None
+        return {**entry, 'last_sent_at': values.get(f'{key}:sent') or entry['issued_at']}
+
+    def mark_sent(self, email):
+        # its own key, so a re-send can never write back an entry that was consumed meanwhile
+        self.cache.set(f'{self._key(email)}:sent', timezone.now(), self.ttl)
+
+    def consume(self, email, code):
+        # delete() reports whether this call removed the key: one winner per code
+        return bool(self.cache.delete(self._ticket_key(email, code)))
+
+
+class DatabaseOtpBackend(BaseOtpBackend):
+    """Fallback on the OtpCode table. Rows are deleted once used or expired."""
+
+    def issue(self, email, code, ttl=None):
+        email = normalize_email(email)
+        now = timezone.now()
+        OtpCode.objects.filter(expires_on__lt=now).delete()
+        OtpCode.objects.filter(email=email).delete()
+        OtpCode.objects.create(
+            email=email, code=code, last_sent_on=now, expires_on=now + timedelta(seconds=ttl or self.ttl),
+        )
+
+    def consume(self, email, code):
+        deleted, _ = OtpCode.objects.filter(
+            email=normalize_email(email),
+            code=code,
+            is_used=False,
+            expires_on__gte=timezone.now(),
+        ).delete()
+        return deleted > 0
+
+    def get_live(self, email):
+        otp = OtpCode.objects.filter(
+            email=normalize_email(email), is_used=False, expires_on__gte=timezone.now()
+        ).order_by('-id').first()
+        if not otp:
+            return None
+        return {
+            'code': otp.code, 'issued_at': otp.created_on,
+            'last_sent_at': otp.last_sent_on or otp.created_on, 'expires_at': otp.expires_on,
+        }
+
+    def mark_sent(self, email):
+        OtpCode.objects.filter(
+            email=normalize_email(email), is_used=False, expires_on__gte=timezone.now()
+        ).update(last_sent_on=timezone.now())
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_otp_backend():
+    """Return the backend configured by ``settings.OTP_BACKEND``."""
+    return _load_backend(settings.OTP_BACKEND)
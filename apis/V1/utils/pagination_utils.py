@@ -0,0 +1,120 @@
+"""Keyset (cursor) pagination that fits the ``{status, message, data}`` envelope.
+
+Pages are selected with ``WHERE (k1, k2, ...) < (v1, v2, ...)`` on the
+view's ``keyset_ordering``; the last key must be unique (normally ``id``).
+One extra row is fetched to know whether there is a next page, so no
+``COUNT(*)`` is ever issued.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    default_ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, page_size = self._page_queryset(queryset, request, view)
+        return self._page(list(queryset[:page_size + 1]), page_size)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views (``request.query_params`` must be set)."""
+        queryset, page_size = self._page_queryset(queryset, request, view)
+        return self._page([row async for row in queryset[:page_size + 1]], page_size)
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', None) or self.default_ordering)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, queryset.model))
+        return queryset, page_size
+
+    def _page(self, rows, page_size):
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_position = self._position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_data(self, data):
+        return {'results': data, 'next': self.get_next_link()}
+
+    def get_paginated_response(self, data):
+        return Response({
+            'status': True,
+            'message': 'Data fetched successfully',
+            'data': self.get_paginated_data(data),
+        })
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    # -- cursor encoding -------------------------------------------------
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':'), default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    # -- keyset helpers --------------------------------------------------
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _position(self, row):
+        values = []
+        for name, _ in self._fields():
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def _after(self, position, model):
+        """Rows strictly after ``position`` in the keyset ordering."""
+        condition = Q()
+        equal = {}
+        for (name, descending), raw in zip(self._fields(), position):
+            try:
+                value = model._meta.get_field(name).to_python(raw)
+            except (FieldDoesNotExist, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
@@ -0,0 +1,172 @@
+"""Response renderers and compression.
+
+``ORJSONRenderer`` is DRF's ``JSONRenderer`` with orjson doing the
+encoding. Datetimes and types orjson does not know (``Decimal``, lazy
+strings, querysets) go through DRF's encoder, so their format is
+unchanged. The output parses to the same data, but the bytes can differ:
+orjson formats some floats its own way (``1e16`` for ``1e+16``), writes
+NaN/Infinity as ``null`` instead of raising under ``STRICT_JSON``, and
+leaves U+2028/U+2029 unescaped. ``MessagePackRenderer`` answers
+``Accept: application/msgpack`` and is enabled in settings only when the
+optional ``msgpack`` package is installed.
+
+``CompressionMiddleware`` compresses API payloads (JSON, MessagePack, CSV,
+NDJSON) of at least ``REST_FRAMEWORK['COMPRESSION_MIN_BYTES']`` bytes. It
+uses brotli when the client accepts it and ``brotli`` is installed, and
+gzip otherwise. HTML is left alone because the admin pages carry cookie
+and CSRF secrets, a BREACH target. Media files are left alone because
+they are already compressed and are served in ranges.
+"""
+import orjson
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+COMPRESSIBLE_TYPES = {'application/json', 'application/msgpack', 'application/x-ndjson', 'text/csv'}
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+# ~gzip -6 speed with smaller output; 11 (the default) is for static assets
+BROTLI_QUALITY = 5
+
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(data):
+    """Compact UTF-8 JSON of ``data``, as ``ORJSONRenderer`` renders it."""
+    return orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with orjson doing the encoding."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # pretty-printing (browsable API, ``; indent=``) and ASCII mode are rare: leave them to DRF
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """``application/msgpack`` body; needs the ``msgpack`` package."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # datetimes, decimals etc. become the same strings/numbers as in the JSON body
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def _brotli_sequence(chunks):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        # flush per chunk: an export batch should reach the client when it is produced
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# coding -> (compress bytes, compress an iterable of bytes), most preferred first
+CODINGS = {}
+if brotli is not None:
+    CODINGS['br'] = (lambda content: brotli.compress(content, quality=BROTLI_QUALITY), _brotli_sequence)
+CODINGS['gzip'] = (compress_string, compress_sequence)
+
+
+def accepted_codings(header):
+    """Content codings in an ``Accept-Encoding`` header, without those refused with ``q=0``."""
+    codings = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        quality = params.strip().lower()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            codings.add(coding)
+    return codings
+
+
+def compression_min_bytes():
+    return getattr(settings, 'REST_FRAMEWORK', {}).get('COMPRESSION_MIN_BYTES', DEFAULT_COMPRESSION_MIN_BYTES)
+
+
+def compress_response(request, response):
+    """Compress ``response`` in place when its type, size and the client allow it."""
+    if response.has_header('Content-Encoding'):
+        return response
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type not in COMPRESSIBLE_TYPES:
+        return response
+    if response.streaming:
+        if response.is_async:
+            # no async streams are served yet; compressing one needs an async wrapper
+            return response
+    elif len(response.content) < compression_min_bytes():
+        return response
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    accepted = accepted_codings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    coding = next((coding for coding in CODINGS if coding in accepted), None)
+    if coding is None:
+        return response
+    compress, compress_stream = CODINGS[coding]
+
+    if response.streaming:
+        response.streaming_content = compress_stream(response.streaming_content)
+        del response.headers['Content-Length']
+    else:
+        compressed = compress(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+
+    # RFC 9110 8.8.1: the compressed body is a different representation
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+    response.headers['Content-Encoding'] = coding
+    return response
+
+
+class CompressionMiddleware:
+    """Apply ``compress_response`` to every response; sync and async capable."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
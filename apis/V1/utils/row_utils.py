@@ -0,0 +1,108 @@
+"""Typed row builders for the small list endpoints.
+
+Each builder reads only the columns it needs with ``values_list`` and
+returns plain dicts that DRF renders directly, without instantiating model
+objects or going through a DataFrame.
+"""
+from typing import List, Optional, TypedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import Cart, ReportMaster
+
+
+class CartRow(TypedDict):
+    id: int
+    title: str
+    short_description: Optional[str]
+    quantity: int
+    amount: Optional[int]
+    is_checked: bool
+
+
+class UserReportRow(TypedDict):
+    id: int
+    title: str
+    amount: int
+    image: Optional[str]
+    is_locked: bool
+    report_id: int
+
+
+class OfferRow(TypedDict):
+    id: int
+    title: str
+    short_description: Optional[str]
+
+
+def report_file_url(name):
+    """Absolute URL of a stored report file, or None when there is no file."""
+    if not name:
+        return None
+    storage = ReportMaster._meta.get_field('file').storage
+    return f"{settings.BASE_URL}{storage.url(name)}"
+
+
+def cart_rows(user) -> List[CartRow]:
+    queryset = Cart.objects.filter(user=user).values_list(
+        'id', 'report__title', 'report__report_category__short_desc', 'quantity', 'amount', 'is_checked'
+    )
+    return [
+        CartRow(
+            id=cart_id,
+            title=title,
+            short_description=short_desc,
+            quantity=quantity,
+            amount=amount,
+            is_checked=is_checked,
+        )
+        for cart_id, title, short_desc, quantity, amount, is_checked in queryset
+    ]
+
+
+def user_report_values(queryset):
+    """Columns of ``UserGeneratedReport`` needed by ``user_report_rows``."""
+    return queryset.values(
+        'id', 'user_id', 'user__full_name', 'report__title', 'amount', 'report__file', 'is_locked', 'report_id', 'generated_on'
+    )
+
+
+def user_report_rows(values) -> List[UserReportRow]:
+    # generated_on, not now(): the title must be stable for ETag revalidation
+    return [
+        UserReportRow(
+            id=row['id'],
+            title=f"{row['user__full_name']}_{row['report__title']}_{timezone.localtime(row['generated_on']).replace(tzinfo=None)}",
+            amount=row['amount'],
+            image=report_file_url(row['report__file']),
+            is_locked=row['is_locked'],
+            report_id=row['report_id'],
+        )
+        for row in values
+    ]
+
+
+def library_rows(values) -> List[UserReportRow]:
+    """Rows of the materialized ``UserLibraryEntry`` table, already in display form."""
+    return [
+        UserReportRow(
+            id=row['ugr_id'],
+            title=row['title'],
+            amount=row['amount'],
+            image=row['image'],
+            is_locked=row['is_locked'],
+            report_id=row['report_id'],
+        )
+        for row in values
+    ]
+
+
+def offer_rows() -> List[OfferRow]:
+    offer = ReportMaster.objects.filter(is_deleted=True, is_active=False).values_list(
+        'id', 'title', 'description'
+    ).last()
+    if not offer:
+        return []
+    offer_id, title, description = offer
+    return [OfferRow(id=offer_id, title=title, short_description=description)]
@@ -0,0 +1,88 @@
+"""Ranked full-text search over active reports.
+
+* MySQL: InnoDB ``FULLTEXT`` indexes on ``(title)`` and ``(title, description)``,
+  queried in boolean mode; InnoDB maintains them on every write.
+* SQLite: an external-content FTS5 table (with prefix indexes) kept in
+  sync by triggers, ranked with ``bm25``.
+* Anything else falls back to ``icontains`` ordered by recency (no index).
+
+Every word of the query must match; the last word also matches as a
+prefix so results appear while the user is typing. On SQLite the prefix
+form only expands over titles: ranking every description containing
+some word that starts with "ca" is what made type-ahead slow. Titles
+weigh more than descriptions.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from ..models import ReportMaster
+
+FTS_TABLE = 'apis_v1_reportmaster_fts'
+TITLE_WEIGHT = 4.0
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+
+
+def query_terms(query):
+    return WORD_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _mysql_query(terms):
+    # +word for every term, +prefix* for the last one
+    return ' '.join(f'+{term}' for term in terms[:-1]) + f' +{terms[-1]}*'
+
+
+def _sqlite_query(terms):
+    *words, last = terms
+    return ' AND '.join([*(f'"{word}"' for word in words), f'(title : "{last}"* OR "{last}")'])
+
+
+def search_report_ids(query, category_id=None, limit=20, offset=0):
+    """Ids of active, non-deleted reports matching ``query``, best match first."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    report_table = ReportMaster._meta.db_table
+    category_sql, category_params = '', []
+    if category_id is not None:
+        category_sql, category_params = ' AND r.report_category_id = %s', [category_id]
+
+    if connection.vendor == 'mysql':
+        expression = _mysql_query(terms)
+        sql = (
+            f"SELECT r.id FROM {report_table} r"
+            f" WHERE MATCH(r.title, r.description) AGAINST (%s IN BOOLEAN MODE)"
+            f" AND r.is_active AND NOT r.is_deleted{category_sql}"
+            f" ORDER BY (%s * MATCH(r.title) AGAINST (%s IN BOOLEAN MODE)"
+            f" + MATCH(r.title, r.description) AGAINST (%s IN BOOLEAN MODE)) DESC, r.id DESC"
+            f" LIMIT %s OFFSET %s"
+        )
+        params = [expression, *category_params, TITLE_WEIGHT, expression, expression, limit, offset]
+    elif connection.vendor == 'sqlite':
+        sql = (
+            f"SELECT r.id FROM {FTS_TABLE} f JOIN {report_table} r ON r.id = f.rowid"
+            f" WHERE {FTS_TABLE} MATCH %s AND r.is_active AND NOT r.is_deleted{category_sql}"
+            f" ORDER BY bm25({FTS_TABLE}, %s, 1.0), r.id DESC LIMIT %s OFFSET %s"
+        )
+        params = [_sqlite_query(terms), *category_params, TITLE_WEIGHT, limit, offset]
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(description__icontains=term)
+        queryset = ReportMaster.objects.filter(condition, is_active=True, is_deleted=False)
+        if category_id is not None:
+            queryset = queryset.filter(report_category_id=category_id)
+        return list(queryset.order_by('-id').values_list('id', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_reports(query, category_id=None, limit=20, offset=0):
+    """Matching reports (with their category) in rank order."""
+    ids = search_report_ids(query, category_id, limit, offset)
+    reports = ReportMaster.objects.select_related('report_category').in_bulk(ids)
+    return [reports[report_id] for report_id in ids if report_id in reports]
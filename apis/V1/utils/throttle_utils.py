@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import math
+import time
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from .otp_utils import normalize_email
+
+# the bucket lock is held for one get/set pair; expiry only matters if a worker dies holding it
+BUCKET_LOCK_SECONDS = 2
+BUCKET_LOCK_ATTEMPTS = 20
+BUCKET_LOCK_RETRY_DELAY = 0.005
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket on top of DRF's rate strings.
+
+    A rate of ``"5/hour"`` means a burst of 5 requests, refilled evenly
+    over the hour. State is one small ``(tokens, timestamp)`` tuple per
+    key in the cache. The read-modify-write runs under a ``cache.add`` lock
+    so concurrent requests cannot spend the same token; a request that
+    cannot get the lock after a few short retries is refused.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock_key = f'{self.key}:lock'
+        for _ in range(BUCKET_LOCK_ATTEMPTS):
+            if self.cache.add(lock_key, 1, BUCKET_LOCK_SECONDS):
+                break
+            time.sleep(BUCKET_LOCK_RETRY_DELAY)
+        else:
+            return self._contended()
+        try:
+            allowed, state = self._spend(self.cache.get(self.key), self.timer())
+            self.cache.set(self.key, state, self.duration)
+        finally:
+            self.cache.delete(lock_key)
+        return allowed
+
+    async def aallow_request(self, request, view):
+        """``allow_request`` for async views; ``request`` needs ``META`` and ``data``."""
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock_key = f'{self.key}:lock'
+        for _ in range(BUCKET_LOCK_ATTEMPTS):
+            if await self.cache.aadd(lock_key, 1, BUCKET_LOCK_SECONDS):
+                break
+            await asyncio.sleep(BUCKET_LOCK_RETRY_DELAY)
+        else:
+            return self._contended()
+        try:
+            allowed, state = self._spend(await self.cache.aget(self.key), self.timer())
+            await self.cache.aset(self.key, state, self.duration)
+        finally:
+            await self.cache.adelete(lock_key)
+        return allowed
+
+    def _contended(self):
+        # a burst on one key is what the limit is for: refuse rather than skip the check
+        self._wait = BUCKET_LOCK_SECONDS
+        return False
+
+    def _spend(self, state, now):
+        """Take one token from the bucket ``state``; returns ``(allowed, new state)``."""
+        capacity, period = self.num_requests, self.duration
+        refill_per_second = capacity / period
+
+        tokens, last = state or (capacity, now)
+        tokens = min(capacity, tokens + (now - last) * refill_per_second)
+
+        if tokens < 1:
+            self._wait = (1 - tokens) / refill_per_second
+            return False, (tokens, now)
+
+        self._wait = None
+        return True, (tokens - 1, now)
+
+    def wait(self):
+        return math.ceil(self._wait) if self._wait else None
+
+
+class OtpIpThrottle(TokenBucketThrottle):
+    scope = 'otp_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class OtpEmailThrottle(TokenBucketThrottle):
+    scope = 'otp_email'
+
+    def get_cache_key(self, request, view):
+        # a JSON list (or scalar) body has no email; the view rejects it with 400
+        if not isinstance(request.data, dict):
+            return None
+        email = normalize_email(request.data.get('email'))
+        if not email:
+            return None
+        ident = hashlib.sha1(email.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,156 @@
+"""Chunked, resumable uploads (``UploadSession``).
+
+A chunk is copied from the request stream to the session's temp file in
+UPLOAD_READ_SIZE pieces and hashed on the way, so neither the chunk nor
+the file is ever held in memory. A chunk must start at the session's
+``received`` offset; anything else is rejected with the offset to resume
+from. On finalize the temp file is moved (not copied) into storage when
+the storage is on the same filesystem.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.utils import timezone
+
+from ..models import Ad, ReportMaster, UploadSession
+
+TARGETS = {
+    # target: (model, file field)
+    'REPORT_FILE': (ReportMaster, 'file'),
+    'AD_VIDEO': (Ad, 'video'),
+}
+
+
+class UploadError(Exception):
+    """Rejected chunk or finalize; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class AssembledFile(File):
+    """Lets FileSystemStorage move the temp file into place instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def session_path(session):
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f'{session.pk}.part')
+
+
+def open_session(session):
+    """Create the (empty) temp file of a new session."""
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    open(session_path(session), 'wb').close()
+
+
+def purge_expired_sessions():
+    """Drop open sessions untouched for UPLOAD_SESSION_TTL seconds, with their temp files."""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    expired = list(UploadSession.objects.filter(status='OPEN', updated_on__lt=cutoff))
+    for session in expired:
+        try:
+            os.remove(session_path(session))
+        except FileNotFoundError:
+            pass
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+    return len(expired)
+
+
+def _lock(session):
+    cache = caches[settings.CATALOG_CACHE_ALIAS]
+    key = f'upload:{session.pk}:lock'
+    if not cache.add(key, 1, settings.UPLOAD_LOCK_SECONDS):
+        raise UploadError('Another chunk for this upload is in progress.', status=409)
+    return lambda: cache.delete(key)
+
+
+def write_chunk(session, stream, offset, length, expected_sha256=None):
+    """Append ``length`` bytes from ``stream`` at ``offset``; returns the new offset."""
+    if session.status != 'OPEN':
+        raise UploadError('Upload is already finalized.', status=409)
+    if length > settings.UPLOAD_CHUNK_MAX_BYTES:
+        raise UploadError(f'Chunks are limited to {settings.UPLOAD_CHUNK_MAX_BYTES} bytes.', status=413)
+    if offset + length > session.total_size:
+        raise UploadError('Chunk runs past the declared size.')
+
+    release = _lock(session)
+    try:
+        # re-read under the lock: a retried chunk may already have landed
+        received = UploadSession.objects.values_list('received', flat=True).get(pk=session.pk)
+        if offset != received:
+            raise UploadError(f'Expected offset {received}.', status=409)
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(session_path(session), 'r+b') as handle:
+            handle.seek(offset)
+            handle.truncate()
+            while written < length:
+                piece = stream.read(min(settings.UPLOAD_READ_SIZE, length - written))
+                if not piece:
+                    break
+                handle.write(piece)
+                digest.update(piece)
+                written += len(piece)
+            if written != length or (expected_sha256 and digest.hexdigest() != expected_sha256.lower()):
+                handle.truncate(offset)
+                raise UploadError('Chunk was incomplete or failed its checksum.')
+
+        UploadSession.objects.filter(pk=session.pk).update(received=offset + length, updated_on=timezone.now())
+        session.received = offset + length
+        return session.received
+    finally:
+        release()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(settings.UPLOAD_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(session, expected_sha256=None):
+    """Verify the assembled file and attach it to the target object; returns that object."""
+    release = _lock(session)
+    try:
+        session.refresh_from_db()
+        return _attach(session, expected_sha256)
+    finally:
+        release()
+
+
+def _attach(session, expected_sha256):
+    if session.status != 'OPEN':
+        raise UploadError('Upload is already finalized.', status=409)
+    if session.received != session.total_size:
+        raise UploadError(f'Upload is incomplete: {session.received} of {session.total_size} bytes.', status=409)
+
+    model, field_name = TARGETS[session.target]
+    instance = model.objects.filter(pk=session.object_id).first()
+    if instance is None:
+        raise UploadError(f'{model.__name__} {session.object_id} no longer exists.', status=404)
+
+    path = session_path(session)
+    sha256 = file_sha256(path)
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        raise UploadError('File checksum does not match.')
+
+    with open(path, 'rb') as handle:
+        getattr(instance, field_name).save(session.filename, AssembledFile(handle), save=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    session.sha256 = sha256
+    session.status = 'COMPLETE'
+    session.save(update_fields=['sha256', 'status', 'updated_on'])
+    return instance
@@ -0,0 +1,90 @@
+"""Admin user lookup on normalized, indexed search tokens.
+
+Each user gets ``UserSearchToken`` rows: the lower-cased email, its local
+part, every word of the names and the whole full name, all accent-free.
+A query matches users for whom every query word is a prefix of one of
+their tokens. Each word is an index range scan on (token, user); no user
+row is read until the matching ids are known.
+"""
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ..models import UserSearchToken
+
+WORD_RE = re.compile(r'[^\s,;]+')
+TOKEN_FIELDS = ('email', 'first_name', 'last_name', 'full_name')
+MAX_QUERY_WORDS = 4
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+def user_tokens(user):
+    tokens = set()
+    email = normalize(user.email)
+    if email:
+        tokens.update({email, email.split('@', 1)[0]})
+    for field in ('first_name', 'last_name', 'full_name'):
+        value = normalize(getattr(user, field))
+        tokens.update(WORD_RE.findall(value))
+    full_name = normalize(user.full_name)
+    if full_name:
+        tokens.add(full_name)
+    max_length = UserSearchToken._meta.get_field('token').max_length
+    return {token[:max_length] for token in tokens if token}
+
+
+def sync_user_tokens(user, created=False):
+    """Bring the user's tokens in line with the current row; no writes if unchanged."""
+    wanted = user_tokens(user)
+    current = set() if created else set(UserSearchToken.objects.filter(user=user).values_list('token', flat=True))
+    if current - wanted:
+        UserSearchToken.objects.filter(user=user, token__in=current - wanted).delete()
+    if wanted - current:
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user=user, token=token) for token in wanted - current], ignore_conflicts=True,
+        )
+
+
+def rebuild_user_tokens(users, token_model=UserSearchToken, batch_size=2000):
+    """Replace the tokens of every user in ``users``, in id-ordered batches.
+
+    Returns the number of users processed. Migrations pass their historical
+    ``token_model`` (and a queryset of the historical user model).
+    """
+    users = users.only('id', 'email', 'first_name', 'last_name', 'full_name').order_by('id')
+    last_id, count = 0, 0
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return count
+        with transaction.atomic():
+            token_model.objects.filter(user__in=batch).delete()
+            token_model.objects.bulk_create(
+                [token_model(user=user, token=token) for user in batch for token in user_tokens(user)],
+                batch_size=5000,
+            )
+        count += len(batch)
+        last_id = batch[-1].id
+
+
+def _prefix(word):
+    if connection.vendor == 'mysql':
+        # case-insensitive collation: LIKE 'abc%' is an index range
+        return Q(token__istartswith=word)
+    # binary collation: an explicit range works on every backend's btree
+    return Q(token__gte=word, token__lt=word + '\U0010ffff')
+
+
+def filter_users(queryset, query):
+    """Restrict a UserMaster queryset to users matching every word of ``query``."""
+    words = WORD_RE.findall(normalize(query))[:MAX_QUERY_WORDS]
+    for word in words:
+        matching = UserSearchToken.objects.filter(_prefix(word)).values('user_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
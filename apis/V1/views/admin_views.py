@@ -1,11 +1,17 @@
+from django.db.models import Exists, OuterRef
+
+from apis.V1.db_router import ReplicaReadMixin
 from apis.V1.views.app_views import create_response
+from apis.V1.utils.conditional_utils import ConditionalListMixin, conditional_list
+from apis.V1.utils.import_utils import CatalogImportError, import_catalog
+from apis.V1.utils.user_search_utils import filter_users
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from ..models import Ad, ReportsCategory, ReportMaster, UserMaster
+from ..models import Ad, ReportsCategory, ReportMaster, UserGeneratedReport, UserMaster
 from ..serializers.admin_serializers import AdSerializer, ReportsCategorySerializer, ReportMasterSerializer, UserMasterSerializer
-from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.viewsets import ModelViewSet
 
 
@@ -15,7 +21,7 @@ class IsAdminUser(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
-class ReportsCategoryViewSet(viewsets.ModelViewSet):
+class ReportsCategoryViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """CRUD API for ReportsCategory with admin-only access. Supports file uploads."""
     queryset = ReportsCategory.objects.all()
     serializer_class = ReportsCategorySerializer
@@ -24,6 +30,7 @@ class ReportsCategoryViewSet(viewsets.ModelViewSet):
     filterset_fields = ['is_active', 'is_deleted']
     search_fields = ['category']
     ordering_fields = ['created_on', 'updated_on', 'category']
+    keyset_ordering = ('-created_on', '-id')
 
     def get_queryset(self):
         """Allow filtering by is_active and is_deleted."""
@@ -39,7 +46,7 @@ class ReportsCategoryViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-created_on')
 
 
-class ReportMasterViewSet(viewsets.ModelViewSet):
+class ReportMasterViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """CRUD API for ReportMaster with admin-only access. Supports file uploads."""
     queryset = ReportMaster.objects.all()
     serializer_class = ReportMasterSerializer
@@ -48,10 +55,11 @@ class ReportMasterViewSet(viewsets.ModelViewSet):
     filterset_fields = ['report_category', 'is_active', 'is_deleted']
     search_fields = ['title', 'description']
     ordering_fields = ['created_on', 'updated_on', 'title']
+    keyset_ordering = ('-created_on', '-id')
 
     def get_queryset(self):
         """Allow filtering by is_active, is_deleted, and report_category."""
-        queryset = ReportMaster.objects.all()
+        queryset = ReportMaster.objects.select_related('report_category')
         is_active = self.request.query_params.get('is_active')
         is_deleted = self.request.query_params.get('is_deleted')
         category_id = self.request.query_params.get('category')
@@ -64,32 +72,72 @@ class ReportMasterViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(report_category_id=category_id)
         
         return queryset.order_by('-created_on')
+
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[permissions.IsAuthenticated, IsAdminUser])
+    def bulk_import(self, request):
+        """Import reports from a CSV manifest, or a ZIP of ``manifest.csv`` plus the files.
+
+        Form fields: ``file`` and optional ``dry_run``. Nothing is written
+        unless every row is valid; per-row errors come back in ``data.errors``.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            response = create_response(False, 'A CSV or ZIP file is required')
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return response
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            result = import_catalog(upload, dry_run=dry_run)
+        except CatalogImportError as exc:
+            response = create_response(False, str(exc))
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return response
+
+        if result.errors:
+            response = create_response(False, 'Import rejected, no rows were written', result.as_dict())
+            response.status_code = status.HTTP_400_BAD_REQUEST
+        elif dry_run:
+            response = create_response(True, 'Manifest is valid', result.as_dict())
+        else:
+            response = create_response(True, 'Catalog imported', result.as_dict())
+            response.status_code = status.HTTP_201_CREATED
+        return response
     
 
 
-class UserListViewSet(viewsets.ReadOnlyModelViewSet):
+class UserListViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """GET-only API for User Master. Requires authentication."""
     queryset = UserMaster.objects.filter(is_active=True, is_deleted=False)
     serializer_class = UserMasterSerializer
     # permission_classes = [permissions.IsAuthenticated]
     search_fields = ['first_name', 'last_name', 'email', 'full_name']
     ordering_fields = ['id']
+    keyset_ordering = ('-id',)
 
     def get_queryset(self):
-        """Filter users by category_id if provided, otherwise return all active users."""
+        """Active users, optionally narrowed by ``search`` (name/email prefixes) and
+        ``category_id`` (users holding a report of that category)."""
         queryset = UserMaster.objects.filter(is_active=True, is_deleted=False)
         category_id = self.request.query_params.get('category_id')
-        
+        search = self.request.query_params.get('search')
+
+        if search:
+            queryset = filter_users(queryset, search)
         if category_id:
-            queryset = queryset.filter(report_category_id=category_id)
-        
+            queryset = queryset.filter(Exists(UserGeneratedReport.objects.filter(
+                user_id=OuterRef('pk'), report_category_id=category_id,
+            )))
+
         return queryset.order_by('-id')
 
+    @conditional_list
     def list(self, request, *args, **kwargs):
         """Override list to return custom response format."""
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return create_response(True, 'Data fetched successfully', serializer.data)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return create_response(True, 'Data fetched successfully', self.paginator.get_paginated_data(serializer.data))
 
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to return custom response format."""
@@ -97,7 +145,7 @@ class UserListViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(instance)
         return create_response(True, 'Data fetched successfully', serializer.data)
 
-class AdViewSet(ModelViewSet):
+class AdViewSet(ReplicaReadMixin, ConditionalListMixin, ModelViewSet):
     queryset = Ad.objects.all()
     serializer_class = AdSerializer
     parser_classes = [MultiPartParser, FormParser]
\ No newline at end of file
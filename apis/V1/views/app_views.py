@@ -1,37 +1,59 @@
+import math
 import random
 from datetime import timedelta
 
 from django.utils import timezone
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 
 from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from AiBhagya.settings import BASE_URL
-from apis.V1.utils.app_utils import get_ads_for_report
+from apis.V1.db_router import ReplicaReadMixin
+from apis.V1.utils.app_utils import ad_inventory, get_ads_for_report, price_to_amount, record_ad_watch, remember_watched_ad
+from apis.V1.utils.cache_utils import cached_catalog
+from apis.V1.utils.conditional_utils import ConditionalListMixin, conditional_list
+from apis.V1.utils.mail_utils import queue_email
+from apis.V1.utils.otp_utils import get_otp_backend
+from apis.V1.utils.library_utils import sync_library
+from apis.V1.utils.row_utils import cart_rows, library_rows, offer_rows
+from apis.V1.utils.search_utils import query_terms, search_reports
+from apis.V1.utils.throttle_utils import OtpEmailThrottle, OtpIpThrottle
 from ..serializers.otp_serializers import OtpVerifySerializer
 
-from ..models import Ad, AdWatch, Cart, UserGeneratedReport, UserMaster, OtpCode, ReportsCategory, ReportMaster
+from ..models import Cart, UserGeneratedReport, UserLibraryEntry, UserMaster, ReportsCategory, ReportMaster
 from ..serializers.app_serializers import AddToCartSerializer, CheckCartSerializer, GlobalSerializer, UserRegistrationSerializer
 from ..serializers.admin_serializers import AdSerializer, AdWatchUpdateSerializer, ReportsCategorySerializer, ReportMasterSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.http import Http404
 from django.shortcuts import get_object_or_404 
 
 
-from django.db import transaction
-import pandas as pd
-import datetime
+from django.db import connection, transaction
 def _generate_otp(n=6):
     return ''.join(str(random.randint(0, 9)) for _ in range(n))
 
 
+def otp_email(email, code, user=None, expires_at=None):
+    """``queue_email`` arguments for the registration OTP message."""
+    if expires_at:
+        expiry_minutes = max(1, math.ceil((expires_at - timezone.now()).total_seconds() / 60))
+    else:
+        expiry_minutes = get_otp_backend().ttl // 60
+    return {
+        'to_email': email,
+        'subject': 'Your verification code',
+        'text_template': 'email/registration_otp.txt',
+        'html_template': 'email/registration_otp.html',
+        'context': {'code': code, 'user': user, 'expiry_minutes': expiry_minutes},
+    }
+
+
 from rest_framework import mixins, viewsets
 class OtpVerifyViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
     """Verify OTP and return JWT tokens."""
@@ -44,19 +66,14 @@ class OtpVerifyViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
         email = serializer.validated_data['email']
         code = serializer.validated_data['code']
 
-        # Find OTP
-        otp_obj = OtpCode.objects.filter(email__iexact=email, code=code, is_used=False, expires_on__gte=timezone.now()).first()
-        if not otp_obj:
+        # Consume the OTP; succeeds only once per code
+        if not get_otp_backend().consume(email, code):
             return Response({
                 'status': False,
                 'message': 'Invalid or expired OTP.',
                 'data': None
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Mark OTP as used
-        otp_obj.is_used = True
-        otp_obj.save()
-
         # Get or create user
         user = UserMaster.objects.filter(email__iexact=email).first()
         if not user:
@@ -80,57 +97,54 @@ class OtpVerifyViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
 
 
 class RegistrationViewSet(viewsets.ModelViewSet):
-    """Handle user registration via POST. If email exists, send OTP; otherwise create user and send OTP."""
+    """Handle user registration via POST. If email exists, send OTP; otherwise create user and send OTP.
+
+    Requests are token-bucket limited per IP and per email before any work is
+    done, and a code that is still live is re-sent instead of minting a new one.
+    """
     serializer_class = UserRegistrationSerializer
     queryset = UserMaster.objects.all()
     http_method_names = ['post']
+    throttle_classes = [OtpIpThrottle, OtpEmailThrottle]
 
-    def _send_otp_email(self, email, code, user=None):
-        context = {
-            'code': code,
-            'user': user,
-            'expiry_minutes': 10,
-        }
-        subject = 'Your verification code'
-        text_content = render_to_string('email/registration_otp.txt', context)
-        html_content = render_to_string('email/registration_otp.html', context)
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
-        message = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=from_email,
-            to=[email],
-        )
-        message.attach_alternative(html_content, "text/html")
-        print(message," sent to ", email)
-        message.send(fail_silently=False)
+    def _send_otp_email(self, email, code, user=None, expires_at=None):
+        """Queue the OTP email; the send_outbox worker delivers it."""
+        queue_email(**otp_email(email, code, user=user, expires_at=expires_at))
 
     def create(self, request, *args, **kwargs):
-        email = request.data.get('email')
+        email = request.data.get('email') if isinstance(request.data, dict) else None
         if not email:
             return Response({'detail': 'Email is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        existing = UserMaster.objects.filter(email__iexact=email).first()
+        otp_backend = get_otp_backend()
+        live = otp_backend.get_live(email)
 
-        # generate otp and store
-        code = _generate_otp()
-        expires_on = timezone.now() + timedelta(minutes=10)
-        OtpCode.objects.create(email=email, code=code, expires_on=expires_on)
+        # a code was (re-)sent moments ago: answer without touching the DB or mail
+        if live and timezone.now() - live['last_sent_at'] < timedelta(seconds=settings.OTP_RESEND_COOLDOWN_SECONDS):
+            return Response({'detail': 'OTP already sent. Please check your email.'}, status=status.HTTP_200_OK)
 
-        if existing:
-            # send otp to existing user
-            self._send_otp_email(email, code, user=existing)
-            return Response({'detail': 'User exists. OTP sent to email.'}, status=status.HTTP_200_OK)
-
-        # create user
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        existing = UserMaster.objects.filter(email__iexact=email).first()
 
-        # send otp to newly created user
-        self._send_otp_email(email, code, user=user)
+        if existing:
+            user, response_status = existing, status.HTTP_200_OK
+            detail = 'User exists. OTP sent to email.'
+        else:
+            # create user
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            user, response_status = serializer.save(), status.HTTP_201_CREATED
+            detail = 'User created. OTP sent to email.'
+
+        # reuse the live code, otherwise generate and store a new one
+        if live:
+            code, expires_at = live['code'], live['expires_at']
+            otp_backend.mark_sent(email)
+        else:
+            code, expires_at = _generate_otp(), None
+            otp_backend.issue(email, code)
 
-        return Response({'detail': 'User created. OTP sent to email.'}, status=status.HTTP_201_CREATED)
+        self._send_otp_email(email, code, user=user, expires_at=expires_at)
+        return Response({'detail': detail}, status=response_status)
 
 
 def create_response(status_code, message, data=None):
@@ -142,7 +156,7 @@ def create_response(status_code, message, data=None):
     })
 
 
-class ReportsCategoryListViewSet(viewsets.ReadOnlyModelViewSet):
+class ReportsCategoryListViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """GET-only API for ReportsCategory. Requires authentication."""
     queryset = ReportsCategory.objects.filter(is_active=True, is_deleted=False)
     serializer_class = ReportsCategorySerializer
@@ -150,16 +164,25 @@ class ReportsCategoryListViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['is_active']
     search_fields = ['category']
     ordering_fields = ['created_on', 'category']
+    catalog_namespace = 'categories'
+    keyset_ordering = ('category', 'id')
 
     def get_queryset(self):
         """Return only active, non-deleted categories."""
         return ReportsCategory.objects.filter(is_active=True, is_deleted=False).order_by('category')
 
+    @conditional_list
     def list(self, request, *args, **kwargs):
-        """Override list to return custom response format."""
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return create_response(True, 'Data fetched successfully', serializer.data)
+        """Override list to return custom response format, served from the catalog cache."""
+        def build():
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            return self.paginator.get_paginated_data(list(self.get_serializer(page, many=True).data))
+
+        params = {'host': request.get_host(), **request.query_params.dict()}
+        data, hit = cached_catalog(self.catalog_namespace, params, build)
+        response = create_response(True, 'Data fetched successfully', data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
 
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to return custom response format."""
@@ -168,7 +191,7 @@ class ReportsCategoryListViewSet(viewsets.ReadOnlyModelViewSet):
         return create_response(True, 'Data fetched successfully', serializer.data)
 
 
-class ReportMasterListViewSet(viewsets.ReadOnlyModelViewSet):
+class ReportMasterListViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """GET-only API for ReportMaster. Requires authentication."""
     queryset = ReportMaster.objects.filter(is_active=True, is_deleted=False)
     serializer_class = ReportMasterSerializer
@@ -176,10 +199,12 @@ class ReportMasterListViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['report_category']
     search_fields = ['title', 'description']
     ordering_fields = ['created_on', 'title']
+    catalog_namespace = 'reports'
+    keyset_ordering = ('-created_on', '-id')
 
     def get_queryset(self):
         """Filter reports by category_id if provided, otherwise return all active reports."""
-        queryset = ReportMaster.objects.filter(is_active=True, is_deleted=False)
+        queryset = ReportMaster.objects.filter(is_active=True, is_deleted=False).select_related('report_category')
         category_id = self.request.query_params.get('category_id')
         
         if category_id:
@@ -187,11 +212,18 @@ class ReportMasterListViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset.order_by('-created_on')
 
+    @conditional_list
     def list(self, request, *args, **kwargs):
-        """Override list to return custom response format."""
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return create_response(True, 'Data fetched successfully', serializer.data)
+        """Override list to return custom response format, served from the catalog cache."""
+        def build():
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            return self.paginator.get_paginated_data(list(self.get_serializer(page, many=True).data))
+
+        params = {'host': request.get_host(), **request.query_params.dict()}
+        data, hit = cached_catalog(self.catalog_namespace, params, build)
+        response = create_response(True, 'Data fetched successfully', data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
 
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to return custom response format."""
@@ -199,6 +231,32 @@ class ReportMasterListViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(instance)
         return create_response(True, 'Data fetched successfully', serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search: ``?q=<words>[&category_id=<id>][&page_size=<n>][&offset=<n>]``.
+
+        The last word matches as a prefix, for type-ahead.
+        """
+        query = request.query_params.get('q', '').strip()
+        try:
+            category_id = int(request.query_params['category_id']) if request.query_params.get('category_id') else None
+            page_size = max(1, min(int(request.query_params.get('page_size', 20)), 50))
+            offset = max(0, min(int(request.query_params.get('offset', 0)), 1000))
+        except ValueError:
+            return Response({'status': False, 'message': 'Invalid search parameters.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def build():
+            reports = search_reports(query, category_id, limit=page_size + 1, offset=offset)
+            results = list(self.get_serializer(reports[:page_size], many=True).data)
+            return {'results': results, 'next_offset': offset + page_size if len(reports) > page_size else None}
+
+        params = {'host': request.get_host(), 'q': ' '.join(query_terms(query)),
+                  'category_id': category_id, 'page_size': page_size, 'offset': offset}
+        data, hit = cached_catalog('search', params, build)
+        response = create_response(True, 'Data fetched successfully', data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
 
 
 # --------------add to cart api view set---
@@ -224,26 +282,39 @@ class AddToCartApiViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(data=payload, many=True)
         serializer.is_valid(raise_exception=True)
 
-        items = serializer.validated_data
         user = request.user
+        # unique ids in request order
+        report_ids = list(dict.fromkeys(item['report_id'] for item in serializer.validated_data))
 
-        for item in items:
-            report_id = item['report_id']
-            rep = ReportMaster.objects.filter(id=item['report_id']).last()
+        reports = ReportMaster.objects.only('id', 'price').in_bulk(report_ids)
+        in_cart = set(
+            Cart.objects.filter(user=user, report_id__in=reports.keys()).values_list('report_id', flat=True)
+        )
 
-            cart_obj, created = Cart.objects.get_or_create(
-                user=user,
-                report_id=report_id,
-                amount= rep.price
-            )
+        # ignore_conflicts covers a concurrent request adding the same report
+        Cart.objects.bulk_create(
+            [
+                Cart(user=user, report_id=report_id, amount=price_to_amount(reports[report_id].price))
+                for report_id in report_ids
+                if report_id in reports and report_id not in in_cart
+            ],
+            ignore_conflicts=True,
+        )
 
-            # agar pehle se cart me hai → quantity add
-            if not created:
-                cart_obj.save()
+        results = []
+        for report_id in report_ids:
+            if report_id not in reports:
+                result = "not_found"
+            elif report_id in in_cart:
+                result = "already_in_cart"
+            else:
+                result = "added"
+            results.append({"report_id": report_id, "result": result})
 
         return Response(
             {   "status": True,
-                "message": "Reports added to cart successfully"
+                "message": "Reports added to cart successfully",
+                "data": results
             },
             status=status.HTTP_201_CREATED
         )
@@ -251,50 +322,26 @@ class AddToCartApiViewSet(viewsets.GenericViewSet):
 
 
 # cart details viewSet
-class CartDetailsApiViewSet(viewsets.GenericViewSet):
+class CartDetailsApiViewSet(ConditionalListMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ["get"]
+    private_validators = True
 
+    @conditional_list
     def list(self, request, *args, **kwargs):
-        user = request.user
-        print(user)
-
-        # Query raw cart items
-        carts = Cart.objects.filter(user=user).select_related(
-            "report",
-            "report__report_category"
-        )
+        rows = cart_rows(request.user)
 
-        # Convert queryset → list of dictionaries
-        raw_data = [
-            {
-                "id": c.id,
-                "title": c.report.title,
-                "short_description": c.report.report_category.short_desc,
-                "quantity": c.quantity,
-                "amount": c.amount,     
-                "is_checked": c.is_checked,     
-            }
-            for c in carts
-        ]
-
-        # Create DataFrame
-        df = pd.DataFrame(raw_data)
-
-        if df.empty:
+        if not rows:
             return Response({
                 "status": True,
                 "message": "Cart is empty.",
                 "data": []
             })
 
-        # Convert df → list of dictionaries
-        final_output = df.to_dict(orient="records")
-
         return Response({
             "status": True,
             "message": "Cart details fetched successfully.",
-            "data": final_output
+            "data": rows
         })
     
 
@@ -341,8 +388,16 @@ class UnwindFutureViewset(viewsets.GenericViewSet):
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         user = request.user
-        cart = Cart.objects.filter(user=user, is_checked=True).all()
-        if not cart:
+
+        # Lock the checked cart rows: a concurrent double submit waits here and
+        # then finds the cart already emptied, so reports are generated once.
+        lock_kwargs = {'of': ('self',)} if connection.features.has_select_for_update_of else {}
+        items = list(
+            Cart.objects.select_for_update(**lock_kwargs)
+            .filter(user=user, is_checked=True)
+            .values_list('id', 'report_id', 'report__report_category_id', 'report__price')
+        )
+        if not items:
             return Response(
             {   "status": True,
                 "message": "Report not found."
@@ -350,17 +405,21 @@ class UnwindFutureViewset(viewsets.GenericViewSet):
             status=status.HTTP_200_OK
         )
 
-        for item in cart:
-            user_report = UserGeneratedReport()
-            user_report.user = user
-            user_report.report = item.report
-            user_report.report_category = item.report.report_category
-            user_report.amount = item.report.price
-            user_report.credit = item.report.price
-            user_report.save()
+        UserGeneratedReport.objects.bulk_create([
+            UserGeneratedReport(
+                user=user,
+                report_id=report_id,
+                report_category_id=category_id,
+                amount=price_to_amount(price),
+                credit=price_to_amount(price),
+            )
+            for _, report_id, category_id, price in items
+        ])
 
-        cart.delete()
-        
+        sync_library(UserGeneratedReport.objects.filter(
+            user=user, report_id__in=[report_id for _, report_id, *_ in items], library_entry__isnull=True,
+        ))
+        Cart.objects.filter(id__in=[cart_id for cart_id, *_ in items]).delete()
 
         return Response(
             {   "status": True,
@@ -371,54 +430,34 @@ class UnwindFutureViewset(viewsets.GenericViewSet):
     
 
 
-class UserReportsApiViewSet(viewsets.GenericViewSet):
+class UserReportsApiViewSet(ReplicaReadMixin, ConditionalListMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ["get"]
+    private_validators = True
 
-    def list(self, request, *args, **kwargs):
-        user = request.user
-        print(user)
-
-        # Query raw cart items
-        user_reports = UserGeneratedReport.objects.filter(user=user).select_related(
-            "report",
-            "report__report_category",
-            "user",
-
-
-        )
-
-        # Convert queryset → list of dictionaries
-        raw_data = [
-            {
-                "id": report.id,
-                "title": f"{request.user.full_name}_{report.report.title}_{datetime.datetime.now()}",
-                "amount": report.amount, 
-                "image": f"{BASE_URL}{report.report.file.url}",
-                "is_locked":report.is_locked,
-                "report_id":report.report.id
+    keyset_ordering = ('-ugr_id',)
 
-            }
-            for report in user_reports
-        ]
+    def get_queryset(self):
+        return UserLibraryEntry.objects.filter(user=self.request.user)
 
-        # Create DataFrame
-        df = pd.DataFrame(raw_data)
+    @conditional_list
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset().values(
+            'ugr_id', 'title', 'amount', 'image', 'is_locked', 'report_id'
+        ))
+        data = self.paginator.get_paginated_data(library_rows(page))
 
-        if df.empty:
+        if not data["results"] and not request.query_params.get(self.paginator.cursor_query_param):
             return Response({
                 "status": True,
                 "message": "Section is empty.",
-                "data": []
+                "data": data
             })
 
-        # Convert df → list of dictionaries
-        final_output = df.to_dict(orient="records")
-
         return Response({
             "status": True,
             "message": "Data fetched successfully.",
-            "data": final_output
+            "data": data
         })
     
 
@@ -456,8 +495,6 @@ class ReportAdsAPIView(APIView):
             "ads": AdSerializer(ads, many=True).data
         })
 
-from django.db.models import Sum
-
 class AdWatchCompleteAPIView(APIView):
     
     permission_classes = [IsAuthenticated]
@@ -467,85 +504,43 @@ class AdWatchCompleteAPIView(APIView):
         serializer.is_valid(raise_exception=True)
 
         user = request.user
-        report = get_object_or_404(ReportMaster, id=serializer.validated_data['report_id'])
-        ad = get_object_or_404(Ad, id=serializer.validated_data['ad_id'], is_active=True)
+        report_id = serializer.validated_data['report_id']
+        ad_id = serializer.validated_data['ad_id']
 
-        # ✅ Track ad for this report + user
-        ad_watch, created = AdWatch.objects.get_or_create(
-            user=user,
-            report=report,
-            ad=ad
-        )
+        duration = ad_inventory.duration(ad_id)
+        if duration is None:
+            raise Http404("No Ad matches the given query.")
 
-        # Mark ad completed
-        ad_watch.completed = True
-        ad_watch.watched_seconds = ad.duration  # full duration
-        ad_watch.save()
-
-        # ✅ Check if report should unlock
-        completed_ads = AdWatch.objects.filter(
-            user=user,
-            report=report,
-            completed=True
-        ).count()
-
-        unlocked = False
-        ugr = UserGeneratedReport.objects.filter(user_id=request.user.id, report_id=serializer.validated_data['report_id']).last()
-        ugr.ads_count=completed_ads
-        if completed_ads >= 3:
-            ugr.is_locked=False
-            ugr.unlocked_mode="Ads"
-            ugr.unlocked_on = datetime.datetime.now()
-            ugr.ads_count=3
-            ugr.ads_duration = AdWatch.objects.filter(user=user, report=report).aggregate(total=Sum('watched_seconds'))['total'] or 0
-            ugr.credits_used=9
-            ugr.save()
-        unlocked = True
+        progress = record_ad_watch(user.id, report_id, ad_id, duration)
+        if progress is None:
+            raise Http404("No UserGeneratedReport matches the given query.")
+        remember_watched_ad(user.id, report_id, ad_id)
 
+        completed_ads, is_locked = progress
         return Response({
             "ad_completed": True,
             "ads_completed_count": completed_ads,
-            "report_unlocked": unlocked
+            "report_unlocked": not is_locked
         })
 
 
-class OfferViewsets(viewsets.GenericViewSet):
+class OfferViewsets(ReplicaReadMixin, ConditionalListMixin, viewsets.GenericViewSet):
     # permission_classes = [IsAuthenticated]
     http_method_names = ["get"]
 
+    @conditional_list
     def list(self, request, *args, **kwargs):
-        user = request.user
-        print(user)
-
-        # Query raw cart items
-        c = ReportMaster.objects.filter(is_deleted=True, is_active=False).last()
+        rows = offer_rows()
 
-        # Convert queryset → list of dictionaries
-        raw_data = [
-            {
-                "id": c.id,
-                "title": c.title,
-                "short_description": c.description,   
-            }
-            
-        ]
-
-        # Create DataFrame
-        df = pd.DataFrame(raw_data)
-
-        if df.empty:
+        if not rows:
             return Response({
                 "status": True,
                 "message": "Dataset is empty.",
                 "data": []
             })
 
-        # Convert df → list of dictionaries
-        final_output = df.to_dict(orient="records")
-
         return Response({
             "status": True,
             "message": "",
-            "data": final_output
+            "data": rows
         })
-    
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""Async (ASGI) versions of the app endpoints that mostly wait on I/O.
+
+DRF views are sync-only, so these are plain Django async views. They do
+their own JSON parsing, JWT authentication, throttling and response
+envelope. Lookups use the async ORM and async cache API. Sync-only code
+goes through ``sync_to_async`` in a single hop per request: serializer
+validation with unique checks, the OTP backends, the atomic ad-watch
+update and the ad inventory.
+
+Mounted under ``/async_apis/`` with the same paths, inputs and bodies as
+``/app_apis/``. Catalog entries are cached under their own namespaces (the
+pages embed absolute ``next`` links) but follow the same catalog version.
+Serve with an ASGI server, see ``AiBhagya/asgi.py``.
+"""
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apis.V1.utils.app_utils import ad_inventory, get_ads_for_report, record_ad_watch, remember_watched_ad
+from apis.V1.utils.auth_utils import CachedJWTAuthentication
+from apis.V1.utils.cache_utils import acached_catalog
+from apis.V1.utils.conditional_utils import acatalog_etag, etag_matches, set_validator_headers
+from apis.V1.utils.mail_utils import aqueue_email
+from apis.V1.utils.otp_utils import get_otp_backend
+from apis.V1.utils.pagination_utils import KeysetPagination
+from apis.V1.utils.render_utils import dumps
+from apis.V1.utils.throttle_utils import OtpEmailThrottle, OtpIpThrottle
+from apis.V1.views.app_views import _generate_otp, otp_email
+from ..models import ReportMaster, ReportsCategory, UserGeneratedReport, UserMaster
+from ..serializers.admin_serializers import AdSerializer, AdWatchUpdateSerializer, ReportsCategorySerializer, ReportMasterSerializer
+from ..serializers.app_serializers import UserRegistrationSerializer
+from ..serializers.otp_serializers import OtpVerifySerializer
+
+
+def json_response(data, status=200):
+    # the same encoding ORJSONRenderer gives the DRF views
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """Base for async endpoints: JSON body, optional JWT user, token-bucket throttles.
+
+    Sets ``request.data``, ``request.query_params`` and ``request.user``
+    so the shared helpers (throttles, pagination, validators) work on a
+    plain ``HttpRequest``.
+    """
+    authentication = CachedJWTAuthentication()
+    authentication_required = False
+    throttle_classes = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # token-authenticated, like DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+
+        request.query_params = request.GET
+        try:
+            request.data = json.loads(request.body or b'{}') if method in ('post', 'put', 'patch') else {}
+        except ValueError:
+            return json_response({'detail': 'JSON parse error.'}, status=400)
+        if not isinstance(request.data, dict):
+            return json_response({'detail': 'Expected a JSON object.'}, status=400)
+
+        try:
+            authenticated = await self.authentication.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            return self.unauthorized(exc.detail)
+        # replaces the lazy session user, which must not be resolved on the event loop
+        request.user = authenticated[0] if authenticated else AnonymousUser()
+        if self.authentication_required and not authenticated:
+            return self.unauthorized('Authentication credentials were not provided.')
+
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not await throttle.aallow_request(request, self):
+                response = json_response({'detail': 'Request was throttled.'}, status=429)
+                if throttle.wait():
+                    response['Retry-After'] = str(throttle.wait())
+                return response
+
+        try:
+            return await handler(request, *args, **kwargs)
+        except Http404 as exc:
+            return json_response({'detail': str(exc) or 'Not found.'}, status=404)
+
+    def unauthorized(self, detail):
+        response = json_response({'detail': detail}, status=401)
+        response['WWW-Authenticate'] = self.authentication.authenticate_header(request=None)
+        return response
+
+
+class RegisterView(AsyncAPIView):
+    """Async ``POST /register/``; same rules as ``RegistrationViewSet.create``."""
+    http_method_names = ['post']
+    throttle_classes = (OtpIpThrottle, OtpEmailThrottle)
+
+    async def post(self, request):
+        email = request.data.get('email')
+        if not email:
+            return json_response({'detail': 'Email is required.'}, status=400)
+
+        otp_backend = get_otp_backend()
+        live = await sync_to_async(otp_backend.get_live)(email)
+        if live and timezone.now() - live['last_sent_at'] < timedelta(seconds=settings.OTP_RESEND_COOLDOWN_SECONDS):
+            return json_response({'detail': 'OTP already sent. Please check your email.'})
+
+        user = await UserMaster.objects.filter(email__iexact=email).afirst()
+        if user:
+            response_status, detail = 200, 'User exists. OTP sent to email.'
+        else:
+            serializer = UserRegistrationSerializer(data=request.data)
+            if not await sync_to_async(serializer.is_valid)():
+                return json_response(serializer.errors, status=400)
+            user = await sync_to_async(serializer.save)()
+            response_status, detail = 201, 'User created. OTP sent to email.'
+
+        if live:
+            code, expires_at = live['code'], live['expires_at']
+            await sync_to_async(otp_backend.mark_sent)(email)
+        else:
+            code, expires_at = _generate_otp(), None
+            await sync_to_async(otp_backend.issue)(email, code)
+
+        await aqueue_email(**otp_email(email, code, user=user, expires_at=expires_at))
+        return json_response({'detail': detail}, status=response_status)
+
+
+class OtpVerifyView(AsyncAPIView):
+    """Async ``POST /otp-verify/``; same rules as ``OtpVerifyViewSet.create``."""
+    http_method_names = ['post']
+
+    async def post(self, request):
+        serializer = OtpVerifySerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=400)
+        email = serializer.validated_data['email']
+        code = serializer.validated_data['code']
+
+        if not await sync_to_async(get_otp_backend().consume)(email, code):
+            return json_response({'status': False, 'message': 'Invalid or expired OTP.', 'data': None}, status=400)
+
+        user = await UserMaster.objects.filter(email__iexact=email).afirst()
+        if not user:
+            return json_response({'status': False, 'message': 'User not found for this email.', 'data': None},
+                                 status=404)
+
+        refresh = RefreshToken.for_user(user)
+        return json_response({
+            'status': True,
+            'message': 'OTP verified. Login successful.',
+            'data': {'refresh': str(refresh), 'access': str(refresh.access_token)},
+        })
+
+
+class CatalogListView(AsyncAPIView):
+    """Async catalog list: conditional GET on the catalog version, then the shared catalog cache.
+
+    Cache misses are rebuilt from the primary by ``acached_catalog``.
+    """
+    http_method_names = ['get']
+    catalog_namespace = None
+    serializer_class = None
+    keyset_ordering = None
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    async def get(self, request):
+        etag = await acatalog_etag(request)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+            set_validator_headers(response, etag)
+            return response
+
+        queryset = self.get_queryset(request)
+
+        async def build():
+            paginator = KeysetPagination()
+            page = await paginator.apaginate_queryset(queryset, request, self)
+            rows = self.serializer_class(page, many=True, context={'request': request, 'view': self}).data
+            return paginator.get_paginated_data(list(rows))
+
+        params = {'host': request.get_host(), **request.GET.dict()}
+        data, hit = await acached_catalog(self.catalog_namespace, params, build)
+        response = json_response({'status': True, 'message': 'Data fetched successfully', 'data': data})
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        set_validator_headers(response, etag)
+        return response
+
+
+class CategoryListView(CatalogListView):
+    catalog_namespace = 'async:categories'
+    serializer_class = ReportsCategorySerializer
+    keyset_ordering = ('category', 'id')
+
+    def get_queryset(self, request):
+        return ReportsCategory.objects.filter(is_active=True, is_deleted=False)
+
+
+class ReportListView(CatalogListView):
+    catalog_namespace = 'async:reports'
+    serializer_class = ReportMasterSerializer
+    keyset_ordering = ('-created_on', '-id')
+
+    def get_queryset(self, request):
+        queryset = ReportMaster.objects.filter(is_active=True, is_deleted=False).select_related('report_category')
+        category_id = request.GET.get('category_id')
+        if category_id:
+            queryset = queryset.filter(report_category_id=category_id)
+        return queryset
+
+
+class ReportAdsView(AsyncAPIView):
+    """Async ``GET /reports/<id>/ads/``."""
+    http_method_names = ['get']
+    authentication_required = True
+
+    async def get(self, request, report_id):
+        report = await ReportMaster.objects.filter(id=report_id).only('id').afirst()
+        if report is None:
+            raise Http404("No ReportMaster matches the given query.")
+
+        if await UserGeneratedReport.objects.filter(user=request.user, report=report, is_locked=False).aexists():
+            return json_response({"locked": False, "message": "Report already unlocked"})
+
+        # the ad inventory may reload itself from the database
+        ads = await sync_to_async(get_ads_for_report)(request.user, report)
+        if not ads:
+            return json_response({"locked": True, "message": "No ads available right now"})
+
+        return json_response({
+            "locked": True,
+            "ads_required": settings.ADS_REQUIRED_PER_REPORT,
+            "ads": AdSerializer(ads, many=True).data,
+        })
+
+
+class AdWatchCompleteView(AsyncAPIView):
+    """Async ``POST /ad-watch/complete/``."""
+    http_method_names = ['post']
+    authentication_required = True
+
+    async def post(self, request):
+        serializer = AdWatchUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=400)
+        user_id = request.user.id
+        report_id = serializer.validated_data['report_id']
+        ad_id = serializer.validated_data['ad_id']
+
+        def complete():
+            # one thread hop for the inventory lookup and the atomic counter update
+            duration = ad_inventory.duration(ad_id)
+            if duration is None:
+                raise Http404("No Ad matches the given query.")
+            progress = record_ad_watch(user_id, report_id, ad_id, duration)
+            if progress is None:
+                raise Http404("No UserGeneratedReport matches the given query.")
+            remember_watched_ad(user_id, report_id, ad_id)
+            return progress
+
+        completed_ads, is_locked = await sync_to_async(complete)()
+        return json_response({
+            "ad_completed": True,
+            "ads_completed_count": completed_ads,
+            "report_unlocked": not is_locked,
+        })
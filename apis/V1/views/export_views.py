@@ -0,0 +1,43 @@
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from apis.V1.utils.export_utils import CONTENT_TYPES, DATASETS, ENCODERS, ExportError, build_export, iter_batches
+from apis.V1.views.admin_views import IsAdminUser
+from apis.V1.views.app_views import create_response
+
+
+class ExportAPIView(APIView):
+    """``GET /exports/<dataset>.<csv|ndjson>`` streams a full admin dump.
+
+    Datasets: ``users``, ``unlocks`` (report unlocks and revenue) and
+    ``ad-watches``. Optional ``fields`` (comma-separated column names),
+    ``since`` (inclusive) and ``until`` (exclusive) as ISO dates or datetimes.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # the body is CSV/NDJSON whatever Accept says
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, dataset, fmt):
+        if dataset not in DATASETS or fmt not in ENCODERS:
+            raise Http404("Unknown export.")
+        try:
+            spec, columns, queryset = build_export(dataset, request.query_params)
+        except ExportError as exc:
+            response = create_response(False, str(exc))
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return response
+
+        response = StreamingHttpResponse(
+            ENCODERS[fmt](columns, iter_batches(spec, columns, queryset)), content_type=CONTENT_TYPES[fmt],
+        )
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="{dataset}-{stamp}.{fmt}"'
+        response['Cache-Control'] = 'no-store'
+        # let nginx pass chunks through instead of spooling the whole dump
+        response['X-Accel-Buffering'] = 'no'
+        return response
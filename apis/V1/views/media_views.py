@@ -0,0 +1,37 @@
+from django.http import Http404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from apis.V1.utils.media_utils import media_response
+from ..models import Ad, MediaBlob, ReportMaster
+
+
+class MediaAPIView(APIView):
+    """Authenticated download of a stored file; see ``media_utils.media_response``."""
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # players send Accept: video/*; the body is the file, not a renderer's output
+        return super().perform_content_negotiation(request, force=True)
+
+
+class AdVideoAPIView(MediaAPIView):
+
+    def get(self, request, ad_id):
+        ad = Ad.objects.filter(id=ad_id, is_active=True, is_deleted=False).only('video').first()
+        if ad is None or not ad.video:
+            raise Http404("No Ad matches the given query.")
+        return media_response(request, ad.video, blob=MediaBlob.objects.filter(name=ad.video.name).first())
+
+
+class ReportFileAPIView(MediaAPIView):
+    """A report file is served only to users who unlocked it (or staff)."""
+
+    def get(self, request, report_id):
+        reports = ReportMaster.objects.filter(id=report_id)
+        if not request.user.is_staff:
+            reports = reports.filter(generated_reports_id__user=request.user, generated_reports_id__is_locked=False)
+        report = reports.only('file').first()
+        if report is None or not report.file:
+            raise Http404("No report file matches the given query.")
+        return media_response(request, report.file, blob=MediaBlob.objects.filter(name=report.file.name).first())
@@ -0,0 +1,83 @@
+import re
+
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apis.V1.utils.upload_utils import UploadError, finalize, open_session, purge_expired_sessions, write_chunk
+from apis.V1.views.admin_views import IsAdminUser
+from apis.V1.views.app_views import create_response
+from ..models import UploadSession
+from ..serializers.admin_serializers import ReportMasterSerializer, AdSerializer, UploadSessionSerializer
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Resumable uploads for report files and ad videos.
+
+    1. ``POST /uploads/`` with ``target``, ``object_id``, ``filename``, ``total_size``.
+    2. ``PUT /uploads/<id>/`` per chunk, body = raw bytes, with
+       ``Content-Range: bytes <start>-<end>/<total>`` and optionally
+       ``X-Chunk-SHA256``. A 409 carries the offset to resume from;
+       ``GET /uploads/<id>/`` returns it too.
+    3. ``POST /uploads/<id>/finalize/`` (optional ``sha256`` of the whole file).
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    parser_classes = [JSONParser]
+
+    def create(self, request, *args, **kwargs):
+        purge_expired_sessions()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(created_by=request.user)
+        open_session(session)
+        response = create_response(True, 'Upload started', self.get_serializer(session).data)
+        response.status_code = status.HTTP_201_CREATED
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return create_response(True, 'Data fetched successfully', self.get_serializer(self.get_object()).data)
+
+    def update(self, request, *args, **kwargs):
+        session = self.get_object()
+        match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            return self._error(session, 'Content-Range: bytes <start>-<end>/<total> is required.', status.HTTP_400_BAD_REQUEST)
+        start, end = int(match.group(1)), int(match.group(2))
+        if end < start or int(request.META.get('CONTENT_LENGTH') or 0) != end - start + 1:
+            return self._error(session, 'Content-Length does not match Content-Range.', status.HTTP_400_BAD_REQUEST)
+        if match.group(3) != '*' and int(match.group(3)) != session.total_size:
+            return self._error(session, f'Content-Range total must be {session.total_size}.', status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # request.stream is the raw body; DRF never parses it here
+            write_chunk(session, request.stream, start, end - start + 1, request.META.get('HTTP_X_CHUNK_SHA256'))
+        except UploadError as exc:
+            session.refresh_from_db()
+            return self._error(session, exc.message, exc.status)
+        return create_response(True, 'Chunk stored', self.get_serializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        session = self.get_object()
+        try:
+            instance = finalize(session, request.data.get('sha256'))
+        except UploadError as exc:
+            return self._error(session, exc.message, exc.status)
+        serializer_class = ReportMasterSerializer if session.target == 'REPORT_FILE' else AdSerializer
+        return create_response(True, 'Upload complete', {
+            'upload': self.get_serializer(session).data,
+            'object': serializer_class(instance, context=self.get_serializer_context()).data,
+        })
+
+    def _error(self, session, message, status_code):
+        return Response({
+            'status': False,
+            'message': message,
+            'data': self.get_serializer(session).data,
+        }, status=status_code)